@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['user', 'date', 'status'], name='attendance_user_id_02e304_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_date_status_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='attendance_date_32df9b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'status', 'user'], name='attendance_date_74d4ef_idx'),
+        ),
+    ]
@@ -67,6 +67,9 @@ class Attendance(models.Model):
             models.Index(fields=['user', 'date']),
             models.Index(fields=['date', 'attendance_type']),
             models.Index(fields=['user', 'attendance_type', 'date']),
+            models.Index(fields=['user', 'date', 'status']),
+            # Covers date-range status grouping together with the user join
+            models.Index(fields=['date', 'status', 'user']),
         ]
     
     def __str__(self):
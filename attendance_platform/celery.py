@@ -0,0 +1,16 @@
+"""
+Celery application for the attendance platform.
+
+Start a worker with:
+    celery -A attendance_platform worker --pool=prefork --concurrency=<cpu count>
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_platform.settings')
+
+app = Celery('attendance_platform')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
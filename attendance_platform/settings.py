@@ -272,6 +272,48 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache Configuration
+# {% cache %} fragments use the 'template_fragments' cache; point it at Redis in production
+TEMPLATE_FRAGMENT_CACHE_URL = os.environ.get('TEMPLATE_FRAGMENT_CACHE_URL')
+# Analytics payloads and their invalidation version live in the 'analytics' cache,
+# which must be shared by every web and Celery process; the in-memory fallback
+# only stays consistent when a single process serves the site
+ANALYTICS_CACHE_URL = os.environ.get('ANALYTICS_CACHE_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': TEMPLATE_FRAGMENT_CACHE_URL,
+    } if TEMPLATE_FRAGMENT_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+    },
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ANALYTICS_CACHE_URL,
+    } if ANALYTICS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'analytics',
+    },
+}
+
+# Celery Configuration (Redis Broker)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://127.0.0.1:6379/1')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://127.0.0.1:6379/1')
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_TRACK_STARTED = True
+CELERY_BEAT_SCHEDULE = {
+    'refresh-attendance-daily-agg': {
+        'task': 'reports.tasks.refresh_attendance_daily_agg_task',
+        'schedule': 60 * 60 * 24,
+    },
+}
+
 # WebSocket Settings
 WEBSOCKET_URL = '/ws/'
 WEBSOCKET_ALLOWED_ORIGINS = [
@@ -0,0 +1,47 @@
+"""
+Test settings for attendance_platform project.
+
+Extends the main settings with tooling that only makes sense while the
+test suite runs, such as failing on lazy-loaded N+1 queries.
+"""
+
+import logging
+
+from .settings import *  # noqa: F401,F403
+
+# Keep the test database in memory; every xdist worker is its own process
+# and so gets a private database
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Fast hashing for users created in fixtures
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+# Keep analytics caches private to each test process, even when a shared
+# backend is configured through ANALYTICS_CACHE_URL
+CACHES = {
+    **CACHES,
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'analytics',
+    },
+}
+
+# Run Celery tasks inline so queued work is visible to the test that queued it
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# nplusone comes from requirements-dev.txt and is required, so the N+1 guard
+# cannot silently drop out of a test run
+INSTALLED_APPS = INSTALLED_APPS + ['nplusone.ext.django']
+MIDDLEWARE = ['nplusone.ext.django.NPlusOneMiddleware'] + MIDDLEWARE
+
+# Raise on any lazy load inside a loop so N+1s fail the test run
+NPLUSONE_RAISE = True
+NPLUSONE_LOGGER = logging.getLogger('nplusone')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['user', 'start_date', 'end_date'], name='idx_leave_user_startend'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0003_leaverequest_user_start_end_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['start_date', 'status'], name='idx_leave_start_status'),
+        ),
+    ]
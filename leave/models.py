@@ -72,6 +72,10 @@ class LeaveRequest(models.Model):
     class Meta:
         db_table = 'leave_requests'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'start_date', 'end_date'], name='idx_leave_user_startend'),
+            models.Index(fields=['start_date', 'status'], name='idx_leave_start_status'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.leave_type.name} ({self.start_date} to {self.end_date})"
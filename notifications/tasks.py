@@ -0,0 +1,15 @@
+"""
+Background tasks for sending notifications
+"""
+
+from celery import shared_task
+
+from payroll.models import Payroll
+from .utils import send_bulk_payroll_notification
+
+
+@shared_task
+def send_payroll_notifications_bulk(payroll_ids, action='generated'):
+    """Send notifications for a batch of payroll records"""
+    payrolls = Payroll.objects.filter(id__in=payroll_ids).select_related('user')
+    return len(send_bulk_payroll_notification(payrolls, action))
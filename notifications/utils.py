@@ -186,12 +186,10 @@ def send_shift_notification(shift_schedule, action='assigned'):
     )
 
 
-def send_payroll_notification(payroll, action='generated'):
+def _payroll_notification_content(payroll, action):
     """
-    Send payroll-related notifications
+    Return (title, message, priority) for a payroll notification
     """
-    user = payroll.user
-    
     if action == 'generated':
         title = "Payroll Generated"
         message = f"Your payroll for {payroll.month}/{payroll.year} has been generated. Net pay: ${payroll.net_pay}"
@@ -205,8 +203,17 @@ def send_payroll_notification(payroll, action='generated'):
         message = f"Your payroll for {payroll.month}/{payroll.year} has been updated"
         priority = 'medium'
     
+    return title, message, priority
+
+
+def send_payroll_notification(payroll, action='generated'):
+    """
+    Send payroll-related notifications
+    """
+    title, message, priority = _payroll_notification_content(payroll, action)
+    
     create_and_send_notification(
-        user=user,
+        user=payroll.user,
         title=title,
         message=message,
         notification_type='payroll',
@@ -216,6 +223,38 @@ def send_payroll_notification(payroll, action='generated'):
     )
 
 
+def send_bulk_payroll_notification(payrolls, action='generated'):
+    """
+    Send payroll notifications for many payroll records with a single insert
+    """
+    try:
+        notifications = []
+        for payroll in payrolls:
+            title, message, priority = _payroll_notification_content(payroll, action)
+            notifications.append(Notification(
+                user=payroll.user,
+                title=title,
+                message=message,
+                notification_type='payroll',
+                priority=priority,
+                related_object_type='payroll',
+                related_object_id=payroll.id
+            ))
+        
+        created_notifications = Notification.objects.bulk_create(notifications)
+        
+        # Send real-time notifications
+        for notification in created_notifications:
+            send_real_time_notification(notification)
+        
+        logger.info(f"Sent {len(created_notifications)} payroll notifications")
+        return created_notifications
+        
+    except Exception as e:
+        logger.error(f"Error sending bulk payroll notifications: {str(e)}")
+        return []
+
+
 def send_system_notification(users, title, message, priority='medium'):
     """
     Send system-wide notifications to multiple users
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum, Avg, Count
 from .models import Payroll
+from .services import recalculate_payroll
 from django.utils import timezone
 
 
@@ -103,10 +104,7 @@ class PayrollAdmin(admin.ModelAdmin):
         updated = 0
         for payroll in queryset:
             try:
-                # Import the calculation method
-                from .views import PayrollCalculationView
-                view = PayrollCalculationView()
-                view.calculate_payroll(payroll)
+                recalculate_payroll(payroll)
                 updated += 1
             except Exception as e:
                 self.message_user(
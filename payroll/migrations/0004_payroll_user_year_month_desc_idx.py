@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0003_payroll_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payroll',
+            name='payroll_u_y_m_idx',
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['user', '-year', '-month'], name='payroll_user_year_month_idx'),
+        ),
+    ]
@@ -62,6 +62,11 @@ class Payroll(models.Model):
         db_table = 'payroll'
         unique_together = ['user', 'month', 'year']
         ordering = ['-year', '-month']
+        indexes = [
+            models.Index(fields=['user', '-year', '-month'], name='payroll_user_year_month_idx'),
+            models.Index(fields=['year', 'month', 'status'], name='payroll_y_m_s_idx'),
+            models.Index(fields=['month', 'year'], name='payroll_m_y_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.month}/{self.year}"
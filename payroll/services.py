@@ -0,0 +1,93 @@
+"""
+Payroll calculation shared by the API views, background tasks and admin
+"""
+
+import functools
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from attendance.models import Attendance
+
+REGULAR_HOURS_CAP = Decimal('160.00')  # 160 hours = 8 hours * 20 working days
+OVERTIME_MULTIPLIER = Decimal('1.5')
+
+
+@functools.lru_cache(maxsize=512)
+def _month_bounds(year, month):
+    """Return the first and last date of the given month"""
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        end = date(year, month + 1, 1) - timedelta(days=1)
+    return start, end
+
+
+def employee_pay_rates(employee):
+    """Return (basic_salary, hourly_rate) for an employee, defaulting to zero"""
+    basic_salary = getattr(employee, 'basic_salary', None) or Decimal('0.00')
+    hourly_rate = getattr(employee, 'hourly_rate', None) or Decimal('0.00')
+    return basic_salary, hourly_rate
+
+
+def monthly_hours_by_user(year, month):
+    """Return {user_id: total hours worked} for every user with attendance in the month"""
+    start_date, end_date = _month_bounds(year, month)
+    
+    rows = Attendance.objects.filter(
+        date__range=[start_date, end_date],
+        status__in=['present', 'late'],
+        hours_worked__gt=0
+    ).order_by().values('user_id').annotate(total=Sum('hours_worked'))
+    
+    return {row['user_id']: row['total'] for row in rows}
+
+
+def apply_payroll_hours(payroll, total_hours):
+    """Fill in the hours and pay fields of a payroll from its total hours worked"""
+    # Calculate regular and overtime hours
+    regular_hours = min(total_hours, REGULAR_HOURS_CAP)
+    overtime_hours = max(total_hours - REGULAR_HOURS_CAP, Decimal('0.00'))
+    
+    # Calculate pay
+    overtime_rate = payroll.hourly_rate * OVERTIME_MULTIPLIER
+    regular_pay = regular_hours * payroll.hourly_rate
+    overtime_pay = overtime_hours * overtime_rate
+    
+    # Calculate gross pay
+    gross_pay = regular_pay + overtime_pay
+    
+    # Calculate net pay
+    net_pay = gross_pay - payroll.tax_deduction - payroll.other_deductions
+    
+    # Update payroll record
+    payroll.total_hours_worked = total_hours
+    payroll.regular_hours = regular_hours
+    payroll.overtime_hours = overtime_hours
+    payroll.regular_pay = regular_pay
+    payroll.overtime_pay = overtime_pay
+    payroll.gross_pay = gross_pay
+    payroll.net_pay = net_pay
+    
+    return payroll
+
+
+def recalculate_payroll(payroll):
+    """Calculate payroll based on attendance records and save it"""
+    # Get attendance records for the month
+    start_date, end_date = _month_bounds(payroll.year, payroll.month)
+    
+    # Total hours worked for the month; hours_worked is a DecimalField
+    total_hours = Attendance.objects.filter(
+        user_id=payroll.user_id,
+        date__range=[start_date, end_date],
+        status__in=['present', 'late'],
+        hours_worked__gt=0
+    ).aggregate(total=Sum('hours_worked'))['total'] or Decimal('0.00')
+    
+    apply_payroll_hours(payroll, total_hours)
+    payroll.save()
+    
+    return payroll
@@ -0,0 +1,114 @@
+"""
+Background tasks for payroll processing
+"""
+
+import logging
+from decimal import Decimal
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from reports.cache import invalidate_analytics
+
+from .models import Payroll
+from .services import apply_payroll_hours, employee_pay_rates, monthly_hours_by_user
+
+# Import notification tasks
+try:
+    from notifications.tasks import send_payroll_notifications_bulk
+except ImportError:
+    # Fallback if notifications app is not available
+    send_payroll_notifications_bulk = None
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+# Columns needed when generating payrolls in bulk; pay rates are read
+# from the user when the model provides them
+EMPLOYEE_PAYROLL_FIELDS = ('id', 'first_name', 'last_name', 'username', 'employee_id')
+
+PAYROLL_BATCH_SIZE = 500
+
+
+def queue_payroll_notifications(payroll_ids, action='generated'):
+    """Queue one notification task for a batch of payrolls once the transaction commits"""
+    if not payroll_ids or send_payroll_notifications_bulk is None:
+        return
+    payroll_ids = list(payroll_ids)
+    
+    def queue():
+        try:
+            send_payroll_notifications_bulk.delay(payroll_ids, action)
+        except Exception:
+            # The payrolls are already committed; a broker outage must not fail the request
+            logger.exception('Could not queue %s notifications for payrolls %s', action, payroll_ids)
+    
+    transaction.on_commit(queue)
+
+
+@shared_task
+def generate_payroll_for_month(month, year, requested_by_id=None):
+    """Create and calculate payroll records for all active employees"""
+    employees = User.objects.filter(is_active=True, role='employee').only(*EMPLOYEE_PAYROLL_FIELDS)
+    existing_user_ids = set(
+        Payroll.objects.filter(month=month, year=year).values_list('user_id', flat=True)
+    )
+    hours_by_user = monthly_hours_by_user(year, month)
+    
+    # Build the payroll records in memory; nothing is saved per employee
+    payrolls = []
+    for employee in employees:
+        # Skip employees who already have a payroll for this period
+        if employee.id in existing_user_ids:
+            continue
+        
+        basic_salary, hourly_rate = employee_pay_rates(employee)
+        payroll = Payroll(
+            user=employee,
+            month=month,
+            year=year,
+            basic_salary=basic_salary,
+            hourly_rate=hourly_rate,
+            tax_deduction=Decimal('0.00'),
+            other_deductions=Decimal('0.00'),
+            status='pending'
+        )
+        apply_payroll_hours(payroll, hours_by_user.get(employee.id, Decimal('0.00')))
+        payrolls.append(payroll)
+    
+    generated_user_ids = []
+    errors = []
+    
+    # Commit the whole run once; each batch gets its own savepoint
+    with transaction.atomic():
+        for start in range(0, len(payrolls), PAYROLL_BATCH_SIZE):
+            batch = payrolls[start:start + PAYROLL_BATCH_SIZE]
+            try:
+                with transaction.atomic():
+                    Payroll.objects.bulk_create(batch, ignore_conflicts=True)
+                generated_user_ids.extend(payroll.user_id for payroll in batch)
+            except Exception as e:
+                errors.append(f"Error generating payroll batch of {len(batch)} records: {str(e)}")
+        
+        # bulk_create with ignore_conflicts does not return primary keys
+        generated_ids = list(
+            Payroll.objects.filter(
+                month=month, year=year, user_id__in=generated_user_ids
+            ).values_list('id', flat=True)
+        )
+        queue_payroll_notifications(generated_ids, 'generated')
+        
+        # bulk_create skips post_save, so expire cached analytics explicitly
+        transaction.on_commit(invalidate_analytics)
+    
+    generated_count = len(generated_ids)
+    logger.info(
+        'Generated %s payroll records for %s/%s (requested by user %s)',
+        generated_count, month, year, requested_by_id
+    )
+    
+    return {
+        'generated_count': generated_count,
+        'errors': errors
+    }
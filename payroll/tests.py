@@ -7,8 +7,10 @@ from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
 from datetime import datetime, timedelta
+from unittest import mock
 
 from .models import Payroll
+from .services import recalculate_payroll
 from attendance.models import Attendance
 
 User = get_user_model()
@@ -347,11 +349,68 @@ class PayrollAPITest(APITestCase):
         }
         
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.hr_token}')
-        response = self.client.post(url, data)
+        with mock.patch('payroll.views.generate_payroll_for_month.delay') as delay:
+            delay.return_value.id = 'task-123'
+            response = self.client.post(url, data)
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['task_id'], 'task-123')
+        delay.assert_called_once_with(data['month'], data['year'], self.hr_user.id)
+    
+    def test_generate_payroll_task(self):
+        """Test the payroll generation task creates one record per employee"""
+        from .tasks import generate_payroll_for_month
+        
+        now = timezone.now()
+        result = generate_payroll_for_month(now.month, now.year, self.hr_user.id)
+        
+        self.assertEqual(result['generated_count'], 1)
+        self.assertEqual(result['errors'], [])
+        self.assertTrue(
+            Payroll.objects.filter(user=self.employee, month=now.month, year=now.year).exists()
+        )
+    
+    def test_generate_payroll_task_invalidates_analytics(self):
+        """Test bulk payroll generation expires cached analytics"""
+        from reports.cache import get_analytics_version
+        from .tasks import generate_payroll_for_month
+        
+        now = timezone.now()
+        version = get_analytics_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_payroll_for_month(now.month, now.year, self.hr_user.id)
+        
+        self.assertGreater(get_analytics_version(), version)
+    
+    def test_payroll_notifications_survive_broker_errors(self):
+        """Test a broker outage while queueing notifications is logged, not raised"""
+        from .tasks import queue_payroll_notifications
+        
+        with mock.patch('payroll.tasks.send_payroll_notifications_bulk') as task:
+            task.delay.side_effect = ConnectionError('broker down')
+            with self.assertLogs('payroll.tasks', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    queue_payroll_notifications([1], 'generated')
+        
+        task.delay.assert_called_once_with([1], 'generated')
+    
+    def test_payslips_bulk_download(self):
+        """Test streaming all payslips for a month as CSV"""
+        Payroll.objects.create(
+            user=self.employee,
+            month=8,
+            year=2025,
+            basic_salary=Decimal('5000.00'),
+            hourly_rate=Decimal('25.00')
+        )
+        
+        self.client.force_login(self.hr_user)
+        response = self.client.get(reverse('payroll:payslips_bulk_download'), {'month': 8, 'year': 2025})
+        content = b''.join(response.streaming_content).decode()
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue('generated' in response.data['message'])
-        self.assertTrue('generated_count' in response.data)
+        self.assertIn('PAYSLIP', content)
+        self.assertIn('EMP001', content)
 
 
 class PayrollCalculationTest(APITestCase):
@@ -415,9 +474,7 @@ class PayrollCalculationTest(APITestCase):
         )
         
         # Calculate payroll
-        from .views import PayrollCalculationView
-        view = PayrollCalculationView()
-        view.calculate_payroll(payroll)
+        recalculate_payroll(payroll)
         
         # Refresh from database
         payroll.refresh_from_db()
@@ -469,9 +526,7 @@ class PayrollCalculationTest(APITestCase):
         )
         
         # Calculate payroll
-        from .views import PayrollCalculationView
-        view = PayrollCalculationView()
-        view.calculate_payroll(payroll)
+        recalculate_payroll(payroll)
         
         # Refresh from database
         payroll.refresh_from_db()
@@ -5,7 +5,7 @@ from .views import (
     PayrollListView, PayrollDetailView, PayrollCreateView, PayrollCalculationView,
     PayrollReportView, PayrollSummaryView, PayrollBulkActionView, PayrollAdjustmentView,
     PayrollComparisonView, my_payroll, auto_generate_payroll, payroll_web_view, payslip_download_web,
-    generate_payslips_web
+    generate_payslips_web, payroll_task_status, payslips_bulk_download_web
 )
 
 app_name = 'payroll'
@@ -22,6 +22,7 @@ urlpatterns = [
     # Payroll calculations
     path('calculate/', PayrollCalculationView.as_view(), name='payroll_calculate'),
     path('auto-generate/', auto_generate_payroll, name='auto_generate_payroll'),
+    path('tasks/<str:task_id>/', payroll_task_status, name='payroll_task_status'),
     
     # Reports and analytics
     path('reports/', PayrollReportView.as_view(), name='payroll_reports'),
@@ -41,5 +42,6 @@ urlpatterns = [
     path('payroll-web/', payroll_web_view, name='payroll_web'),
     path('payslip-download/<int:payroll_id>/', payslip_download_web, name='payslip_download'),
     path('generate-payslips/', generate_payslips_web, name='generate_payslips'),
+    path('payslips-download/', payslips_bulk_download_web, name='payslips_bulk_download'),
     path('my-payroll-web/', payroll_web_view, name='my_payroll_web'),
 ]
@@ -2,6 +2,7 @@ from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.settings import api_settings
 from django.utils import timezone
 from django.db.models import Q, Sum, Avg, Count, F
 try:
@@ -9,15 +10,18 @@ try:
 except ImportError:
     DjangoFilterBackend = None
 from rest_framework import filters
-from datetime import datetime, timedelta
 import csv
+import itertools
 from io import StringIO
+from collections import defaultdict
 from decimal import Decimal, ROUND_HALF_UP
 from django.shortcuts import render
+from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib import messages
 from utils.currency import format_currency
+from celery.result import AsyncResult
 
 from .models import Payroll
 from .serializers import (
@@ -26,18 +30,129 @@ from .serializers import (
     PayrollBulkActionSerializer, PayrollExportSerializer, PayrollAdjustmentSerializer,
     PayrollComparisonSerializer, PayrollTaxCalculationSerializer
 )
-from users.models import User
-from attendance.models import Attendance
-# Import notification utilities
-try:
-    from notifications.utils import send_payroll_notification
-except ImportError:
-    # Fallback if notifications app is not available
-    def send_payroll_notification(*args, **kwargs):
-        pass
+from .services import employee_pay_rates, recalculate_payroll
+from .tasks import generate_payroll_for_month, queue_payroll_notifications
+from reports.cache import invalidate_analytics
+
+
+# Columns rendered by PayrollSerializer, used to trim list/detail queries
+PAYROLL_SERIALIZER_FIELDS = (
+    'id', 'user', 'month', 'year', 'basic_salary', 'hourly_rate',
+    'total_hours_worked', 'regular_hours', 'overtime_hours', 'regular_pay',
+    'overtime_pay', 'tax_deduction', 'other_deductions', 'gross_pay', 'net_pay',
+    'status', 'approved_by', 'approved_at', 'created_at', 'updated_at',
+    'user__first_name', 'user__last_name', 'user__username', 'user__employee_id',
+    'user__department', 'user__position',
+    'approved_by__first_name', 'approved_by__last_name', 'approved_by__username'
+)
+
+# Columns shown on the employee payroll page (payroll/my_payroll.html)
+MY_PAYROLL_WEB_FIELDS = (
+    'id', 'user', 'month', 'year', 'basic_salary', 'regular_pay', 'overtime_pay',
+    'gross_pay', 'tax_deduction', 'other_deductions', 'net_pay',
+    'total_hours_worked', 'regular_hours', 'overtime_hours', 'status',
+    'user__employee_id', 'user__first_name', 'user__last_name'
+)
+
+
+def _paginated_payroll_response(request, queryset, **extra):
+    """Serialize one page of payroll records with the paginator's total count"""
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        payroll_data = PayrollSerializer(queryset, many=True).data
+        return Response({**extra, 'payroll_records': payroll_data, 'total_records': len(payroll_data)})
+    
+    return Response({
+        **extra,
+        'payroll_records': PayrollSerializer(page, many=True).data,
+        'total_records': paginator.page.paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link()
+    })
+
+
+def _can_manage(request):
+    """Return request.user.can_manage_attendance(), evaluated once per request"""
+    if not hasattr(request, '_can_manage_cache'):
+        request._can_manage_cache = request.user.can_manage_attendance()
+    return request._can_manage_cache
+
+
+class ManageAttendanceRequiredMixin:
+    """Per-request cached HR/Manager check for payroll views"""
+    
+    def _can_manage(self, request):
+        return _can_manage(request)
+
+
+CSV_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _buffered_csv_stream(rows, chunk_size=CSV_STREAM_CHUNK_SIZE):
+    """Yield CSV text for rows in chunks of roughly chunk_size characters"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+PAYSLIP_EARNINGS = (
+    ('Basic Salary', 'basic_salary'),
+    ('Regular Pay', 'regular_pay'),
+    ('Overtime Pay', 'overtime_pay'),
+    ('Gross Pay', 'gross_pay'),
+)
+PAYSLIP_DEDUCTIONS = (
+    ('Tax Deduction', 'tax_deduction'),
+    ('Other Deductions', 'other_deductions'),
+)
+PAYSLIP_HOURS = (
+    ('Total Hours Worked', 'total_hours_worked'),
+    ('Regular Hours', 'regular_hours'),
+    ('Overtime Hours', 'overtime_hours'),
+)
+
+
+def _payslip_rows(payroll):
+    """Return the CSV rows of a single payslip"""
+    def money_rows(fields):
+        return [[label, format_currency(getattr(payroll, field))] for label, field in fields]
+    
+    return [
+        ['PAYSLIP'],
+        ['Employee ID', payroll.user.employee_id],
+        ['Name', payroll.user.get_full_name()],
+        ['Department', payroll.user.department or 'N/A'],
+        ['Month/Year', f"{payroll.month}/{payroll.year}"],
+        [],
+        ['EARNINGS'],
+        *money_rows(PAYSLIP_EARNINGS),
+        [],
+        ['DEDUCTIONS'],
+        *money_rows(PAYSLIP_DEDUCTIONS),
+        [],
+        ['NET PAY', format_currency(payroll.net_pay)],
+        [],
+        ['HOURS'],
+        *([label, f"{getattr(payroll, field)}"] for label, field in PAYSLIP_HOURS)
+    ]
+
+
+def _payslip_csv(payroll):
+    """Render a single payslip as CSV text with one writerows call"""
+    buffer = StringIO()
+    csv.writer(buffer).writerows(_payslip_rows(payroll))
+    return buffer.getvalue()
 
 
-class PayrollListView(generics.ListAPIView):
+class PayrollListView(ManageAttendanceRequiredMixin, generics.ListAPIView):
     """List all payroll records (HR/Admin only)"""
     serializer_class = PayrollSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -48,10 +163,10 @@ class PayrollListView(generics.ListAPIView):
     ordering = ['-year', '-month', '-created_at']
     
     def get_queryset(self):
-        if not self.request.user.can_manage_attendance():
+        if not self._can_manage(self.request):
             return Payroll.objects.none()
         
-        queryset = Payroll.objects.select_related('user', 'approved_by')
+        queryset = Payroll.objects.select_related('user', 'approved_by').only(*PAYROLL_SERIALIZER_FIELDS)
         
         # Filter by department if specified
         department = self.request.query_params.get('department')
@@ -61,23 +176,23 @@ class PayrollListView(generics.ListAPIView):
         return queryset
 
 
-class PayrollDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PayrollDetailView(ManageAttendanceRequiredMixin, generics.RetrieveUpdateDestroyAPIView):
     """Payroll record detail view (HR/Admin only)"""
     serializer_class = PayrollSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        if not self.request.user.can_manage_attendance():
+        if not self._can_manage(self.request):
             return Payroll.objects.none()
-        return Payroll.objects.select_related('user', 'approved_by')
+        return Payroll.objects.select_related('user', 'approved_by').only(*PAYROLL_SERIALIZER_FIELDS)
 
 
-class PayrollCreateView(APIView):
+class PayrollCreateView(ManageAttendanceRequiredMixin, APIView):
     """Create new payroll record (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can create payroll records'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -87,10 +202,10 @@ class PayrollCreateView(APIView):
             payroll = serializer.save()
             
             # Auto-calculate payroll based on attendance
-            self.calculate_payroll(payroll)
+            recalculate_payroll(payroll)
             
             # Send notification
-            send_payroll_notification(payroll, 'generated')
+            queue_payroll_notifications([payroll.id], 'generated')
             
             return Response({
                 'message': 'Payroll record created successfully',
@@ -98,64 +213,14 @@ class PayrollCreateView(APIView):
             }, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def calculate_payroll(self, payroll):
-        """Calculate payroll based on attendance records"""
-        user = payroll.user
-        month = payroll.month
-        year = payroll.year
-        
-        # Get attendance records for the month
-        start_date = datetime(year, month, 1).date()
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
-        
-        # Get all attendance records for the month
-        attendance_records = Attendance.objects.filter(
-            user=user,
-            date__range=[start_date, end_date],
-            status__in=['present', 'late']
-        )
-        
-        # Calculate total hours worked
-        total_hours = Decimal('0.00')
-        for record in attendance_records:
-            if record.hours_worked > 0:
-                total_hours += Decimal(str(record.hours_worked))
-        
-        # Calculate regular and overtime hours
-        regular_hours = min(total_hours, Decimal('160.00'))  # 160 hours = 8 hours * 20 working days
-        overtime_hours = max(total_hours - Decimal('160.00'), Decimal('0.00'))
-        
-        # Calculate pay
-        regular_pay = regular_hours * payroll.hourly_rate
-        overtime_pay = overtime_hours * (payroll.hourly_rate * Decimal('1.5'))
-        
-        # Calculate gross pay
-        gross_pay = regular_pay + overtime_pay
-        
-        # Calculate net pay
-        net_pay = gross_pay - payroll.tax_deduction - payroll.other_deductions
-        
-        # Update payroll record
-        payroll.total_hours_worked = total_hours
-        payroll.regular_hours = regular_hours
-        payroll.overtime_hours = overtime_hours
-        payroll.regular_pay = regular_pay
-        payroll.overtime_pay = overtime_pay
-        payroll.gross_pay = gross_pay
-        payroll.net_pay = net_pay
-        payroll.save()
 
 
-class PayrollCalculationView(APIView):
+class PayrollCalculationView(ManageAttendanceRequiredMixin, APIView):
     """Calculate or recalculate payroll (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can calculate payroll'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -166,6 +231,7 @@ class PayrollCalculationView(APIView):
             month = serializer.validated_data['month']
             year = serializer.validated_data['year']
             recalculate = serializer.validated_data.get('recalculate', False)
+            basic_salary, hourly_rate = employee_pay_rates(user)
             
             # Get or create payroll record
             payroll, created = Payroll.objects.get_or_create(
@@ -173,8 +239,8 @@ class PayrollCalculationView(APIView):
                 month=month,
                 year=year,
                 defaults={
-                    'basic_salary': user.basic_salary if hasattr(user, 'basic_salary') else Decimal('0.00'),
-                    'hourly_rate': user.hourly_rate if hasattr(user, 'hourly_rate') else Decimal('0.00'),
+                    'basic_salary': basic_salary,
+                    'hourly_rate': hourly_rate,
                     'tax_deduction': Decimal('0.00'),
                     'other_deductions': Decimal('0.00'),
                     'status': 'pending'
@@ -182,7 +248,7 @@ class PayrollCalculationView(APIView):
             )
             
             # Calculate payroll
-            self.calculate_payroll(payroll)
+            recalculate_payroll(payroll)
             
             action = 'recalculated' if not created else 'calculated'
             return Response({
@@ -192,63 +258,28 @@ class PayrollCalculationView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    def calculate_payroll(self, payroll):
-        """Calculate payroll based on attendance records"""
-        user = payroll.user
-        month = payroll.month
-        year = payroll.year
-        
-        # Get attendance records for the month
-        start_date = datetime(year, month, 1).date()
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
-        
-        # Get all attendance records for the month
-        attendance_records = Attendance.objects.filter(
-            user=user,
-            date__range=[start_date, end_date],
-            status__in=['present', 'late']
-        )
-        
-        # Calculate total hours worked
-        total_hours = Decimal('0.00')
-        for record in attendance_records:
-            if record.hours_worked > 0:
-                total_hours += Decimal(str(record.hours_worked))
-        
-        # Calculate regular and overtime hours
-        regular_hours = min(total_hours, Decimal('160.00'))  # 160 hours = 8 hours * 20 working days
-        overtime_hours = max(total_hours - Decimal('160.00'), Decimal('0.00'))
-        
-        # Calculate pay
-        regular_pay = regular_hours * payroll.hourly_rate
-        overtime_pay = overtime_hours * (payroll.hourly_rate * Decimal('1.5'))
-        
-        # Calculate gross pay
-        gross_pay = regular_pay + overtime_pay
-        
-        # Calculate net pay
-        net_pay = gross_pay - payroll.tax_deduction - payroll.other_deductions
-        
-        # Update payroll record
-        payroll.total_hours_worked = total_hours
-        payroll.regular_hours = regular_hours
-        payroll.overtime_hours = overtime_hours
-        payroll.regular_pay = regular_pay
-        payroll.overtime_pay = overtime_pay
-        payroll.gross_pay = gross_pay
-        payroll.net_pay = net_pay
-        payroll.save()
 
-
-class PayrollReportView(APIView):
+class PayrollReportView(ManageAttendanceRequiredMixin, APIView):
     """Generate payroll reports (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
+    CSV_HEADER = [
+        'Employee ID', 'Name', 'Department', 'Month', 'Year',
+        'Basic Salary', 'Hourly Rate', 'Total Hours', 'Regular Hours',
+        'Overtime Hours', 'Regular Pay', 'Overtime Pay', 'Gross Pay',
+        'Tax Deduction', 'Other Deductions', 'Net Pay', 'Status'
+    ]
+    
+    CSV_FIELDS = [
+        'user', 'user__employee_id', 'user__first_name', 'user__last_name',
+        'user__username', 'user__department', 'month', 'year', 'basic_salary',
+        'hourly_rate', 'total_hours_worked', 'regular_hours', 'overtime_hours',
+        'regular_pay', 'overtime_pay', 'gross_pay', 'tax_deduction',
+        'other_deductions', 'net_pay', 'status'
+    ]
+    
     def get(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can generate payroll reports'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -281,26 +312,23 @@ class PayrollReportView(APIView):
             elif export_format == 'pdf':
                 return self.export_to_pdf(queryset, summary)
             else:
-                # Return JSON response
-                payroll_data = PayrollSerializer(queryset, many=True).data
-                return Response({
-                    'summary': summary,
-                    'payroll_records': payroll_data,
-                    'total_records': len(payroll_data)
-                })
+                # Return JSON response, one page at a time
+                queryset = queryset.select_related('approved_by').only(*PAYROLL_SERIALIZER_FIELDS)
+                return _paginated_payroll_response(request, queryset, summary=summary)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def get_payroll_summary(self, queryset):
         """Calculate payroll summary statistics"""
-        total_employees = queryset.count()
         total_payroll = queryset.aggregate(
+            n=Count('id'),
             total=Sum('net_pay'),
             gross=Sum('gross_pay'),
             overtime=Sum('overtime_pay'),
             tax=Sum('tax_deduction'),
             other=Sum('other_deductions')
         )
+        total_employees = total_payroll['n']
         
         return {
             'total_employees': total_employees,
@@ -313,41 +341,40 @@ class PayrollReportView(APIView):
         }
     
     def export_to_csv(self, queryset, summary):
-        """Export payroll data to CSV"""
-        response = Response(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="payroll_report.csv"'
+        """Export payroll data to CSV, streaming rows as they are read"""
+        records = queryset.select_related('user').only(*self.CSV_FIELDS).iterator(chunk_size=2000)
+        rows = (self.format_csv_row(payroll) for payroll in records)
         
-        writer = csv.writer(response)
-        writer.writerow([
-            'Employee ID', 'Name', 'Department', 'Month', 'Year',
-            'Basic Salary', 'Hourly Rate', 'Total Hours', 'Regular Hours',
-            'Overtime Hours', 'Regular Pay', 'Overtime Pay', 'Gross Pay',
-            'Tax Deduction', 'Other Deductions', 'Net Pay', 'Status'
-        ])
-        
-        for payroll in queryset:
-            writer.writerow([
-                payroll.user.employee_id,
-                payroll.user.get_full_name(),
-                payroll.user.department,
-                payroll.month,
-                payroll.year,
-                payroll.basic_salary,
-                payroll.hourly_rate,
-                payroll.total_hours_worked,
-                payroll.regular_hours,
-                payroll.overtime_hours,
-                payroll.regular_pay,
-                payroll.overtime_pay,
-                payroll.gross_pay,
-                payroll.tax_deduction,
-                payroll.other_deductions,
-                payroll.net_pay,
-                payroll.status
-            ])
+        response = StreamingHttpResponse(
+            _buffered_csv_stream(itertools.chain([self.CSV_HEADER], rows)),
+            content_type='text/csv'
+        )
+        response['Content-Disposition'] = 'attachment; filename="payroll_report.csv"'
         
         return response
     
+    def format_csv_row(self, payroll):
+        """Build a single CSV row for a payroll record"""
+        return [
+            payroll.user.employee_id,
+            payroll.user.get_full_name(),
+            payroll.user.department,
+            payroll.month,
+            payroll.year,
+            payroll.basic_salary,
+            payroll.hourly_rate,
+            payroll.total_hours_worked,
+            payroll.regular_hours,
+            payroll.overtime_hours,
+            payroll.regular_pay,
+            payroll.overtime_pay,
+            payroll.gross_pay,
+            payroll.tax_deduction,
+            payroll.other_deductions,
+            payroll.net_pay,
+            payroll.status
+        ]
+    
     def export_to_pdf(self, queryset, summary):
         """Export payroll data to PDF (placeholder)"""
         # This would integrate with a PDF library like ReportLab
@@ -357,12 +384,12 @@ class PayrollReportView(APIView):
         })
 
 
-class PayrollSummaryView(APIView):
+class PayrollSummaryView(ManageAttendanceRequiredMixin, APIView):
     """Get payroll summary statistics (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can view payroll summaries'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -388,7 +415,16 @@ class PayrollSummaryView(APIView):
     
     def calculate_summary(self, queryset):
         """Calculate comprehensive payroll summary"""
-        total_employees = queryset.count()
+        totals = queryset.aggregate(
+            total_employees=Count('id'),
+            total_payroll=Sum('net_pay'),
+            total_gross=Sum('gross_pay'),
+            total_overtime_hours=Sum('overtime_hours'),
+            total_overtime_pay=Sum('overtime_pay'),
+            total_tax=Sum('tax_deduction'),
+            total_other=Sum('other_deductions')
+        )
+        total_employees = totals['total_employees']
         
         if total_employees == 0:
             return {
@@ -403,28 +439,30 @@ class PayrollSummaryView(APIView):
                 'status_breakdown': {}
             }
         
-        # Basic calculations
-        totals = queryset.aggregate(
-            total_payroll=Sum('net_pay'),
-            total_gross=Sum('gross_pay'),
-            total_overtime_hours=Sum('overtime_hours'),
-            total_overtime_pay=Sum('overtime_pay'),
-            total_tax=Sum('tax_deduction'),
-            total_other=Sum('other_deductions')
-        )
-        
-        # Department breakdown
-        dept_breakdown = queryset.values('user__department').annotate(
-            count=Count('id'),
-            total=Sum('net_pay'),
-            avg=Avg('net_pay')
-        ).order_by('-total')
-        
-        # Status breakdown
-        status_breakdown = queryset.values('status').annotate(
+        # Department and status breakdowns from a single GROUP BY pass
+        rows = queryset.order_by().values('user__department', 'status').annotate(
             count=Count('id'),
             total=Sum('net_pay')
-        ).order_by('-total')
+        )
+        
+        dept_totals = defaultdict(lambda: {'count': 0, 'total': Decimal('0.00')})
+        status_totals = defaultdict(lambda: {'count': 0, 'total': Decimal('0.00')})
+        for row in rows:
+            total = row['total'] or Decimal('0.00')
+            for bucket in (dept_totals[row['user__department']], status_totals[row['status']]):
+                bucket['count'] += row['count']
+                bucket['total'] += total
+        
+        dept_breakdown = sorted((
+            {'user__department': department, 'count': data['count'], 'total': data['total'],
+             'avg': data['total'] / data['count']}
+            for department, data in dept_totals.items()
+        ), key=lambda item: item['total'], reverse=True)
+        
+        status_breakdown = sorted((
+            {'status': status_value, 'count': data['count'], 'total': data['total']}
+            for status_value, data in status_totals.items()
+        ), key=lambda item: item['total'], reverse=True)
         
         return {
             'total_employees': total_employees,
@@ -434,17 +472,17 @@ class PayrollSummaryView(APIView):
             'total_overtime_pay': totals['total_overtime_pay'] or Decimal('0.00'),
             'total_tax_deductions': totals['total_tax'] or Decimal('0.00'),
             'total_other_deductions': totals['total_other'] or Decimal('0.00'),
-            'department_breakdown': list(dept_breakdown),
-            'status_breakdown': list(status_breakdown)
+            'department_breakdown': dept_breakdown,
+            'status_breakdown': status_breakdown
         }
 
 
-class PayrollBulkActionView(APIView):
+class PayrollBulkActionView(ManageAttendanceRequiredMixin, APIView):
     """Perform bulk actions on payroll records (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can perform bulk payroll actions'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -492,12 +530,12 @@ class PayrollBulkActionView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PayrollAdjustmentView(APIView):
+class PayrollAdjustmentView(ManageAttendanceRequiredMixin, APIView):
     """Make adjustments to payroll records (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can make payroll adjustments'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -510,26 +548,25 @@ class PayrollAdjustmentView(APIView):
             reason = serializer.validated_data['reason']
             approved_by = serializer.validated_data['approved_by']
             
-            try:
-                payroll = Payroll.objects.get(id=payroll_id)
-            except Payroll.DoesNotExist:
+            # Bonuses reduce deductions; deductions and corrections add to them
+            delta = -amount if adjustment_type == 'bonus' else amount
+            
+            # Apply adjustment and recalculate net pay in a single UPDATE.
+            # F('other_deductions') refers to the value before this update.
+            updated = Payroll.objects.filter(id=payroll_id).update(
+                other_deductions=F('other_deductions') + delta,
+                net_pay=F('gross_pay') - F('tax_deduction') - F('other_deductions') - delta,
+                updated_at=timezone.now()
+            )
+            if not updated:
                 return Response({
                     'error': 'Payroll record not found'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Apply adjustment
-            if adjustment_type == 'bonus':
-                payroll.other_deductions -= amount  # Reduce deductions (add bonus)
-            elif adjustment_type == 'deduction':
-                payroll.other_deductions += amount  # Add deduction
-            elif adjustment_type == 'correction':
-                # For corrections, we need to know what to correct
-                # This is a simplified version
-                payroll.other_deductions += amount
+            # update() skips post_save, so expire cached analytics explicitly
+            invalidate_analytics()
             
-            # Recalculate net pay
-            payroll.net_pay = payroll.gross_pay - payroll.tax_deduction - payroll.other_deductions
-            payroll.save()
+            payroll = Payroll.objects.select_related('user', 'approved_by').get(id=payroll_id)
             
             return Response({
                 'message': f'{adjustment_type.title()} adjustment applied successfully',
@@ -541,12 +578,12 @@ class PayrollAdjustmentView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PayrollComparisonView(APIView):
+class PayrollComparisonView(ManageAttendanceRequiredMixin, APIView):
     """Compare payroll between two periods (HR/Admin only)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        if not request.user.can_manage_attendance():
+        if not self._can_manage(request):
             return Response({
                 'error': 'Only HR and Managers can compare payroll periods'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -559,17 +596,18 @@ class PayrollComparisonView(APIView):
             period2_year = serializer.validated_data['period2_year']
             user = serializer.validated_data.get('user')
             
-            # Build querysets for both periods
-            period1_qs = Payroll.objects.filter(month=period1_month, year=period1_year)
-            period2_qs = Payroll.objects.filter(month=period2_month, year=period2_year)
+            # Aggregate both periods in a single GROUP BY query
+            queryset = Payroll.objects.filter(
+                Q(month=period1_month, year=period1_year) |
+                Q(month=period2_month, year=period2_year)
+            )
             
             if user:
-                period1_qs = period1_qs.filter(user=user)
-                period2_qs = period2_qs.filter(user=user)
+                queryset = queryset.filter(user=user)
             
-            # Calculate summaries for both periods
-            period1_summary = self.calculate_period_summary(period1_qs)
-            period2_summary = self.calculate_period_summary(period2_qs)
+            summaries = self.calculate_period_summaries(queryset)
+            period1_summary = summaries.get((period1_month, period1_year), self.empty_period_summary())
+            period2_summary = summaries.get((period2_month, period2_year), self.empty_period_summary())
             
             # Calculate differences
             differences = self.calculate_differences(period1_summary, period2_summary)
@@ -590,17 +628,31 @@ class PayrollComparisonView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    def calculate_period_summary(self, queryset):
-        """Calculate summary for a specific period"""
-        return queryset.aggregate(
-            total_employees=Count('id'),
-            total_payroll=Sum('net_pay'),
-            total_gross=Sum('gross_pay'),
-            total_overtime=Sum('overtime_pay'),
-            total_tax=Sum('tax_deduction'),
-            total_other=Sum('other_deductions'),
-            avg_salary=Avg('net_pay')
-        )
+    SUMMARY_AGGREGATES = {
+        'total_employees': Count('id'),
+        'total_payroll': Sum('net_pay'),
+        'total_gross': Sum('gross_pay'),
+        'total_overtime': Sum('overtime_pay'),
+        'total_tax': Sum('tax_deduction'),
+        'total_other': Sum('other_deductions'),
+        'avg_salary': Avg('net_pay')
+    }
+    
+    def calculate_period_summaries(self, queryset):
+        """Calculate summaries keyed by (month, year) for every period in the queryset"""
+        rows = queryset.order_by().values('month', 'year').annotate(**self.SUMMARY_AGGREGATES)
+        
+        summaries = {}
+        for row in rows:
+            key = (row.pop('month'), row.pop('year'))
+            summaries[key] = row
+        return summaries
+    
+    def empty_period_summary(self):
+        """Summary for a period without payroll records"""
+        summary = dict.fromkeys(self.SUMMARY_AGGREGATES)
+        summary['total_employees'] = 0
+        return summary
     
     def calculate_differences(self, period1, period2):
         """Calculate differences between two periods"""
@@ -629,26 +681,23 @@ def my_payroll(request):
     month = request.query_params.get('month')
     year = request.query_params.get('year')
     
-    queryset = Payroll.objects.filter(user=user)
+    queryset = Payroll.objects.filter(user=user).select_related(
+        'user', 'approved_by'
+    ).only(*PAYROLL_SERIALIZER_FIELDS)
     
     if month:
         queryset = queryset.filter(month=month)
     if year:
         queryset = queryset.filter(year=year)
     
-    payroll_data = PayrollSerializer(queryset, many=True).data
-    
-    return Response({
-        'payroll_records': payroll_data,
-        'total_records': len(payroll_data)
-    })
+    return _paginated_payroll_response(request, queryset)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def auto_generate_payroll(request):
     """Auto-generate payroll for all employees for a specific month (HR/Admin only)"""
-    if not request.user.can_manage_attendance():
+    if not _can_manage(request):
         return Response({
             'error': 'Only HR and Managers can auto-generate payroll'
         }, status=status.HTTP_403_FORBIDDEN)
@@ -661,44 +710,40 @@ def auto_generate_payroll(request):
             'error': 'Month and year are required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get all active employees
-    employees = User.objects.filter(is_active=True, role='employee')
+    try:
+        month = int(month)
+        year = int(year)
+    except (TypeError, ValueError):
+        return Response({
+            'error': 'Month and year must be numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    generated_count = 0
-    errors = []
-    
-    for employee in employees:
-        try:
-            # Check if payroll already exists
-            if Payroll.objects.filter(user=employee, month=month, year=year).exists():
-                continue
-            
-            # Create payroll record
-            payroll = Payroll.objects.create(
-                user=employee,
-                month=month,
-                year=year,
-                basic_salary=getattr(employee, 'basic_salary', Decimal('0.00')),
-                hourly_rate=getattr(employee, 'hourly_rate', Decimal('0.00')),
-                tax_deduction=Decimal('0.00'),
-                other_deductions=Decimal('0.00'),
-                status='pending'
-            )
-            
-            # Calculate payroll
-            view = PayrollCalculationView()
-            view.calculate_payroll(payroll)
-            
-            generated_count += 1
-            
-        except Exception as e:
-            errors.append(f"Error generating payroll for {employee.get_full_name()}: {str(e)}")
+    task = generate_payroll_for_month.delay(month, year, request.user.id)
     
     return Response({
-        'message': f'Payroll generation completed. {generated_count} records generated.',
-        'generated_count': generated_count,
-        'errors': errors
-    }, status=status.HTTP_200_OK)
+        'message': 'Payroll generation started.',
+        'task_id': task.id
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def payroll_task_status(request, task_id):
+    """Report the state of a background payroll task (HR/Admin only)"""
+    if not _can_manage(request):
+        return Response({
+            'error': 'Only HR and Managers can view payroll tasks'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    result = AsyncResult(task_id)
+    data = {
+        'task_id': task_id,
+        'status': result.status
+    }
+    if result.successful():
+        data['result'] = result.result
+    
+    return Response(data)
 
 
 @login_required
@@ -707,7 +752,7 @@ def generate_payslips_web(request):
     user = request.user
     
     # Check if user can generate payslips
-    if not user.can_manage_attendance():
+    if not _can_manage(request):
         return render(request, 'payroll/access_denied.html')
     
     if request.method == 'POST':
@@ -719,38 +764,10 @@ def generate_payslips_web(request):
             return render(request, 'payroll/generate_payslips.html')
         
         try:
-            # Get all active employees
-            employees = User.objects.filter(is_active=True, role='employee')
-            
-            generated_count = 0
-            errors = []
-            
-            for employee in employees:
-                try:
-                    # Check if payroll already exists
-                    if Payroll.objects.filter(user=employee, month=month, year=year).exists():
-                        continue
-                    
-                    # Create payroll record
-                    payroll = Payroll.objects.create(
-                        user=employee,
-                        month=month,
-                        year=year,
-                        basic_salary=getattr(employee, 'basic_salary', Decimal('0.00')),
-                        hourly_rate=getattr(employee, 'hourly_rate', Decimal('0.00')),
-                        tax_deduction=Decimal('0.00'),
-                        other_deductions=Decimal('0.00'),
-                        status='pending'
-                    )
-                    
-                    # Calculate payroll
-                    view = PayrollCalculationView()
-                    view.calculate_payroll(payroll)
-                    
-                    generated_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Error generating payroll for {employee.get_full_name()}: {str(e)}")
+            # Run inline so the page can report the outcome straight away
+            result = generate_payroll_for_month(int(month), int(year), user.id)
+            generated_count = result['generated_count']
+            errors = result['errors']
             
             if errors:
                 messages.warning(request, f'Payroll generation completed with {len(errors)} errors. {generated_count} records generated.')
@@ -762,9 +779,10 @@ def generate_payslips_web(request):
         except Exception as e:
             messages.error(request, f'Error during payroll generation: {str(e)}')
     
+    now = timezone.now()
     context = {
-        'current_month': timezone.now().month,
-        'current_year': timezone.now().year,
+        'current_month': now.month,
+        'current_year': now.year,
     }
     
     return render(request, 'payroll/generate_payslips.html', context)
@@ -777,20 +795,26 @@ def payroll_web_view(request):
     month = request.GET.get('month')
     year = request.GET.get('year')
     
-    queryset = Payroll.objects.filter(user=user)
+    base_queryset = Payroll.objects.filter(user=user).select_related('user').only(*MY_PAYROLL_WEB_FIELDS)
+    queryset = base_queryset
     
     if month:
         queryset = queryset.filter(month=month)
     if year:
         queryset = queryset.filter(year=year)
     
-    # Get recent payroll records
-    payroll_records = queryset.order_by('-year', '-month')
+    # Get recent payroll records, one page at a time
+    paginator = Paginator(queryset.order_by('-year', '-month'), 12)
+    payroll_records = paginator.get_page(request.GET.get('page'))
     
     # Get current month payroll if exists
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    current_payroll = queryset.filter(month=current_month, year=current_year).first()
+    now = timezone.now()
+    current_month, current_year = now.month, now.year
+    if month == str(current_month) and year == str(current_year):
+        # The filters already pinned the list to the current month
+        current_payroll = next(iter(payroll_records), None)
+    else:
+        current_payroll = base_queryset.filter(month=current_month, year=current_year).first()
     
     context = {
         'payroll_records': payroll_records,
@@ -805,48 +829,49 @@ def payroll_web_view(request):
 
 
 @login_required
-def payslip_download_web(request):
+def payslip_download_web(request, payroll_id=None):
     """Web-based payslip download"""
     user = request.user
-    payroll_id = request.GET.get('payroll_id')
+    payroll_id = payroll_id or request.GET.get('payroll_id')
     
     if payroll_id:
         try:
-            payroll = Payroll.objects.get(id=payroll_id, user=user)
+            payroll = Payroll.objects.select_related('user').get(id=payroll_id, user=user)
         except Payroll.DoesNotExist:
             return HttpResponse("Payroll record not found", status=404)
     else:
         # Get latest payroll record
-        payroll = Payroll.objects.filter(user=user).order_by('-year', '-month').first()
+        payroll = Payroll.objects.filter(user=user).select_related('user').order_by('-year', '-month').first()
         if not payroll:
             return HttpResponse("No payroll records found", status=404)
     
-    # Generate CSV payslip
-    response = HttpResponse(content_type='text/csv')
+    # Stream CSV payslip, one chunk per payslip
+    response = StreamingHttpResponse([_payslip_csv(payroll)], content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="payslip_{payroll.user.employee_id}_{payroll.month}_{payroll.year}.csv"'
     
-    writer = csv.writer(response)
-    writer.writerow(['PAYSLIP'])
-    writer.writerow(['Employee ID', payroll.user.employee_id])
-    writer.writerow(['Name', payroll.user.get_full_name()])
-    writer.writerow(['Department', getattr(payroll.user, 'department', 'N/A')])
-    writer.writerow(['Month/Year', f"{payroll.month}/{payroll.year}"])
-    writer.writerow([])
-    writer.writerow(['EARNINGS'])
-    writer.writerow(['Basic Salary', f"${payroll.basic_salary}"])
-    writer.writerow(['Regular Pay', f"${payroll.regular_pay}"])
-    writer.writerow(['Overtime Pay', f"${payroll.overtime_pay}"])
-    writer.writerow(['Gross Pay', f"${payroll.gross_pay}"])
-    writer.writerow([])
-    writer.writerow(['DEDUCTIONS'])
-    writer.writerow(['Tax Deduction', f"${payroll.tax_deduction}"])
-    writer.writerow(['Other Deductions', f"${payroll.other_deductions}"])
-    writer.writerow([])
-    writer.writerow(['NET PAY', f"${payroll.net_pay}"])
-    writer.writerow([])
-    writer.writerow(['HOURS'])
-    writer.writerow(['Total Hours Worked', f"{payroll.total_hours_worked}"])
-    writer.writerow(['Regular Hours', f"{payroll.regular_hours}"])
-    writer.writerow(['Overtime Hours', f"{payroll.overtime_hours}"])
+    return response
+
+
+@login_required
+def payslips_bulk_download_web(request):
+    """Stream every payslip for a month as one CSV download (HR/Admin only)"""
+    if not _can_manage(request):
+        return HttpResponse("Only HR and Managers can download all payslips", status=403)
+    
+    try:
+        month = int(request.GET.get('month'))
+        year = int(request.GET.get('year'))
+    except (TypeError, ValueError):
+        return HttpResponse("Month and year are required", status=400)
+    
+    payrolls = Payroll.objects.filter(month=month, year=year).select_related('user').order_by(
+        'user__employee_id'
+    ).iterator(chunk_size=500)
+    
+    # One payslip after another, separated by a blank row
+    rows = itertools.chain.from_iterable(_payslip_rows(payroll) + [[]] for payroll in payrolls)
+    
+    response = StreamingHttpResponse(_buffered_csv_stream(rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="payslips_{month}_{year}.csv"'
     
     return response
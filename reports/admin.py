@@ -5,6 +5,7 @@ from .models import ReportTemplate, ReportExecution, Dashboard, AnalyticsMetric
 @admin.register(ReportTemplate)
 class ReportTemplateAdmin(admin.ModelAdmin):
     list_display = ['name', 'report_type', 'format_type', 'is_public', 'created_by', 'created_at', 'is_active']
+    list_select_related = ('created_by',)
     list_filter = ['report_type', 'format_type', 'is_public', 'is_active', 'created_at']
     search_fields = ['name', 'description', 'created_by__username']
     readonly_fields = ['created_at', 'updated_at']
@@ -29,6 +30,7 @@ class ReportTemplateAdmin(admin.ModelAdmin):
 @admin.register(ReportExecution)
 class ReportExecutionAdmin(admin.ModelAdmin):
     list_display = ['name', 'report_type', 'format_type', 'status', 'requested_by', 'created_at', 'completed_at']
+    list_select_related = ('requested_by',)
     list_filter = ['status', 'report_type', 'format_type', 'created_at']
     search_fields = ['name', 'requested_by__username']
     readonly_fields = ['created_at', 'updated_at', 'generation_time', 'download_count']
@@ -54,11 +56,26 @@ class ReportExecutionAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         })
     )
+    
+    changelist_fields = (
+        'id', 'name', 'report_type', 'format_type', 'status', 'created_at', 'completed_at',
+        'requested_by', 'requested_by__first_name', 'requested_by__last_name',
+        'requested_by__username', 'requested_by__employee_id'
+    )
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # Skip the parameter/filter JSON and error text on the list page only
+        match = request.resolver_match
+        if match and match.url_name and match.url_name.endswith('_changelist'):
+            queryset = queryset.only(*self.changelist_fields)
+        return queryset
 
 
 @admin.register(Dashboard)
 class DashboardAdmin(admin.ModelAdmin):
     list_display = ['name', 'dashboard_type', 'is_default', 'is_public', 'created_by', 'created_at', 'is_active']
+    list_select_related = ('created_by',)
     list_filter = ['dashboard_type', 'is_default', 'is_public', 'is_active', 'created_at']
     search_fields = ['name', 'description', 'created_by__username']
     readonly_fields = ['created_at', 'updated_at']
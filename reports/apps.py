@@ -5,3 +5,7 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
     verbose_name = 'Reports and Analytics'
+
+    def ready(self):
+        # Connect cache invalidation and daily aggregate receivers
+        from . import cache  # noqa: F401
@@ -0,0 +1,100 @@
+"""
+Caching helpers for analytics payloads
+"""
+import functools
+import hashlib
+import json
+
+from django.core.cache import caches
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.connection import ConnectionProxy
+
+from attendance.models import Attendance
+from leave.models import LeaveRequest
+from payroll.models import Payroll
+from shifts.models import ShiftSchedule
+
+from .models import AttendanceDailyAgg
+
+ANALYTICS_CACHE_TIMEOUT = 300
+
+# Shared across processes so a change saved in one invalidates every other;
+# see ANALYTICS_CACHE_URL in settings
+analytics_cache = ConnectionProxy(caches, 'analytics')
+
+# Bumped whenever source data changes so every cached payload goes stale at once
+ANALYTICS_VERSION_KEY = 'reports:analytics:version'
+
+
+def cache_key(prefix, **params):
+    """Build a cache key from a prefix and hashed parameters"""
+    digest = hashlib.blake2b(
+        json.dumps(params, sort_keys=True, default=str).encode(),
+        digest_size=16
+    ).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def get_analytics_version():
+    """Return the current analytics cache version"""
+    return analytics_cache.get_or_set(ANALYTICS_VERSION_KEY, 1, None)
+
+
+def cached_analytics(prefix, params, compute, timeout=ANALYTICS_CACHE_TIMEOUT):
+    """Return the cached payload for params, computing it on a miss"""
+    key = cache_key(prefix, version=get_analytics_version(), **params)
+    return analytics_cache.get_or_set(key, compute, timeout)
+
+
+def _cache_param(value):
+    """Key model instances, such as the requesting user, by primary key"""
+    if isinstance(value, models.Model):
+        return f"{value._meta.label}:{value.pk}"
+    return value
+
+
+def ttl_cached(ttl=60, key=None):
+    """Cache a function's result for ttl seconds, keyed by its arguments or by key(*args, **kwargs)"""
+    def decorator(func):
+        prefix = f"{func.__module__}.{func.__qualname__}"
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                params = key(*args, **kwargs)
+            else:
+                params = {
+                    'args': [_cache_param(arg) for arg in args],
+                    'kwargs': {name: _cache_param(value) for name, value in kwargs.items()},
+                }
+            return cached_analytics(prefix, params, lambda: func(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
+
+
+def invalidate_analytics():
+    """Expire all cached analytics payloads"""
+    try:
+        analytics_cache.incr(ANALYTICS_VERSION_KEY)
+    except ValueError:
+        analytics_cache.set(ANALYTICS_VERSION_KEY, 1, None)
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=LeaveRequest)
+@receiver([post_save, post_delete], sender=Payroll)
+@receiver([post_save, post_delete], sender=ShiftSchedule)
+def invalidate_analytics_on_change(sender, **kwargs):
+    """Expire analytics when the data behind them changes"""
+    invalidate_analytics()
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+def refresh_attendance_daily_agg_on_change(sender, instance, **kwargs):
+    """Re-aggregate an already aggregated day when one of its records changes"""
+    from .utils import refresh_attendance_daily_agg
+    
+    if AttendanceDailyAgg.objects.filter(date=instance.date).exists():
+        refresh_attendance_daily_agg(instance.date, instance.date)
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reports.tasks import ATTENDANCE_AGG_LOOKBACK_DAYS
+from reports.utils import refresh_attendance_daily_agg
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily attendance aggregates used by analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=ATTENDANCE_AGG_LOOKBACK_DAYS,
+            help=f'Number of closed days to refresh (default: {ATTENDANCE_AGG_LOOKBACK_DAYS})',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild aggregates for the whole attendance history',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            start_date = end_date = None
+            self.stdout.write('Refreshing attendance aggregates for all dates...')
+        else:
+            end_date = timezone.now().date() - timedelta(days=1)
+            start_date = end_date - timedelta(days=options['days'] - 1)
+            self.stdout.write(f'Refreshing attendance aggregates from {start_date} to {end_date}...')
+
+        row_count = refresh_attendance_daily_agg(start_date, end_date)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully refreshed {row_count} aggregate rows')
+        )
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+# Matches the reports tables that syncdb created before the app had migrations;
+# databases that already have them should run `migrate reports --fake-initial`
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('metric_type', models.CharField(choices=[('attendance_rate', 'Attendance Rate'), ('late_arrival_rate', 'Late Arrival Rate'), ('leave_utilization', 'Leave Utilization'), ('overtime_hours', 'Overtime Hours'), ('productivity_score', 'Productivity Score'), ('shift_coverage', 'Shift Coverage'), ('payroll_cost', 'Payroll Cost'), ('employee_satisfaction', 'Employee Satisfaction'), ('custom', 'Custom Metric')], max_length=30)),
+                ('description', models.TextField(blank=True)),
+                ('calculation_method', models.TextField(help_text='Description or formula for calculating this metric')),
+                ('query', models.TextField(blank=True, help_text='SQL query or calculation logic')),
+                ('current_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('previous_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('target_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('unit', models.CharField(blank=True, help_text='Unit of measurement', max_length=20)),
+                ('data_source', models.CharField(blank=True, max_length=100)),
+                ('update_frequency', models.CharField(choices=[('real_time', 'Real Time'), ('hourly', 'Hourly'), ('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], default='daily', max_length=20)),
+                ('last_calculated', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'db_table': 'reports_analytics_metrics',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['metric_type'], name='reports_ana_metric__edb29c_idx'), models.Index(fields=['last_calculated'], name='reports_ana_last_ca_3bc2b3_idx'), models.Index(fields=['is_active'], name='reports_ana_is_acti_ec96f4_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Dashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('dashboard_type', models.CharField(choices=[('employee', 'Employee Dashboard'), ('manager', 'Manager Dashboard'), ('hr', 'HR Dashboard'), ('executive', 'Executive Dashboard'), ('custom', 'Custom Dashboard')], max_length=20)),
+                ('widgets', models.JSONField(default=list, help_text='List of widgets and their configurations')),
+                ('layout', models.JSONField(default=dict, help_text='Dashboard layout configuration')),
+                ('refresh_interval', models.PositiveIntegerField(default=300, help_text='Auto-refresh interval in seconds')),
+                ('is_default', models.BooleanField(default=False)),
+                ('is_public', models.BooleanField(default=False)),
+                ('allowed_roles', models.JSONField(default=list, help_text='Roles allowed to access this dashboard')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_dashboards', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reports_dashboards',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['dashboard_type'], name='reports_das_dashboa_3f3c7b_idx'), models.Index(fields=['created_by'], name='reports_das_created_cb4a33_idx'), models.Index(fields=['is_active'], name='reports_das_is_acti_b9663e_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('report_type', models.CharField(choices=[('attendance', 'Attendance Report'), ('leave', 'Leave Report'), ('payroll', 'Payroll Report'), ('shift', 'Shift Report'), ('employee', 'Employee Report'), ('department', 'Department Report'), ('custom', 'Custom Report')], max_length=20)),
+                ('format_type', models.CharField(choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('excel', 'Excel'), ('json', 'JSON')], default='pdf', max_length=10)),
+                ('fields', models.JSONField(default=list, help_text='List of fields to include in the report')),
+                ('filters', models.JSONField(default=dict, help_text='Default filters for the report')),
+                ('grouping', models.JSONField(default=dict, help_text='Grouping configuration')),
+                ('sorting', models.JSONField(default=dict, help_text='Sorting configuration')),
+                ('is_public', models.BooleanField(default=False)),
+                ('allowed_roles', models.JSONField(default=list, help_text='Roles allowed to access this report')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_reports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'reports_templates',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['report_type'], name='reports_tem_report__a5c719_idx'), models.Index(fields=['created_by'], name='reports_tem_created_d21ee4_idx'), models.Index(fields=['is_active'], name='reports_tem_is_acti_41a6de_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportExecution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('report_type', models.CharField(choices=[('attendance', 'Attendance Report'), ('leave', 'Leave Report'), ('payroll', 'Payroll Report'), ('shift', 'Shift Report'), ('employee', 'Employee Report'), ('department', 'Department Report'), ('custom', 'Custom Report')], max_length=20)),
+                ('format_type', models.CharField(choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('excel', 'Excel'), ('json', 'JSON')], max_length=10)),
+                ('parameters', models.JSONField(default=dict, help_text='Parameters used to generate the report')),
+                ('filters', models.JSONField(default=dict, help_text='Filters applied to the report')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=20)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('file_path', models.CharField(blank=True, max_length=500)),
+                ('file_size', models.PositiveIntegerField(blank=True, null=True)),
+                ('download_count', models.PositiveIntegerField(default=0)),
+                ('record_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('generation_time', models.DurationField(blank=True, null=True)),
+                ('is_public', models.BooleanField(default=False)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requested_reports', to=settings.AUTH_USER_MODEL)),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='reports.reporttemplate')),
+            ],
+            options={
+                'db_table': 'reports_executions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status'], name='reports_exe_status_224801_idx'), models.Index(fields=['requested_by'], name='reports_exe_request_5e076a_idx'), models.Index(fields=['report_type'], name='reports_exe_report__beb89e_idx'), models.Index(fields=['created_at'], name='reports_exe_created_23180f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+import django.db.models.functions.math
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analyticsmetric',
+            name='trend',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(current_value__gt=models.F('previous_value'), then=models.Value('up')), models.When(current_value__lt=models.F('previous_value'), then=models.Value('down')), default=models.Value('stable')), output_field=models.CharField(choices=[('up', 'Up'), ('down', 'Down'), ('stable', 'Stable')], max_length=8)),
+        ),
+        migrations.AddField(
+            model_name='analyticsmetric',
+            name='target_achievement',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(models.Q(('target_value', 0), _negated=True), then=django.db.models.functions.math.Round(models.F('current_value') * models.Value(Decimal('100')) / models.F('target_value'), 2)), default=None), output_field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_analyticsmetric_trend_target_achievement'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportexecution',
+            index=models.Index(fields=['status', 'expires_at'], name='reports_exe_status_d20d1b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportexecution',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='reports_exec_expires_idx'),
+        ),
+    ]
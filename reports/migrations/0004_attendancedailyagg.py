@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportexecution_status_expiry_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyAgg',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('hours_count', models.PositiveIntegerField(default=0, help_text='Records with hours worked')),
+                ('total_hours', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'reports_attendance_daily_agg',
+                'ordering': ['date', 'status'],
+                'unique_together': {('date', 'status')},
+            },
+        ),
+    ]
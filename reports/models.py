@@ -1,4 +1,6 @@
+from decimal import Decimal
 from django.db import models
+from django.db.models.functions import Now, Round
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -74,6 +76,24 @@ class ReportTemplate(models.Model):
         return f"{self.name} ({self.get_report_type_display()})"
 
 
+class ReportExecutionQuerySet(models.QuerySet):
+    """QuerySet helpers for report executions"""
+    
+    def with_expiry(self):
+        """Annotate is_expired in the database"""
+        return self.annotate(
+            is_expired=models.Case(
+                models.When(expires_at__lt=Now(), then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField()
+            )
+        )
+    
+    def expired(self):
+        """Executions whose expiry time has passed"""
+        return self.filter(expires_at__lt=Now())
+
+
 class ReportExecution(models.Model):
     """
     Model to track report executions and store generated reports
@@ -124,6 +144,8 @@ class ReportExecution(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ReportExecutionQuerySet.as_manager()
+    
     class Meta:
         db_table = 'reports_executions'
         ordering = ['-created_at']
@@ -132,6 +154,12 @@ class ReportExecution(models.Model):
             models.Index(fields=['requested_by']),
             models.Index(fields=['report_type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(
+                fields=['expires_at'],
+                name='reports_exec_expires_idx',
+                condition=models.Q(expires_at__isnull=False)
+            ),
         ]
     
     def __str__(self):
@@ -140,14 +168,22 @@ class ReportExecution(models.Model):
     @property
     def is_expired(self):
         """Check if the report has expired"""
+        if '_is_expired' in self.__dict__:
+            return self._is_expired
         if self.expires_at:
             return timezone.now() > self.expires_at
         return False
     
+    @is_expired.setter
+    def is_expired(self, value):
+        # Filled in by ReportExecutionQuerySet.with_expiry()
+        self._is_expired = value
+    
     def mark_as_downloaded(self):
         """Increment download count"""
+        ReportExecution.objects.filter(pk=self.pk).update(download_count=models.F('download_count') + 1)
+        # Keep the in-memory value in step without re-reading the row
         self.download_count += 1
-        self.save(update_fields=['download_count'])
 
 
 class Dashboard(models.Model):
@@ -222,6 +258,12 @@ class AnalyticsMetric(models.Model):
         ('custom', 'Custom Metric'),
     ]
     
+    TREND_CHOICES = [
+        ('up', 'Up'),
+        ('down', 'Down'),
+        ('stable', 'Stable'),
+    ]
+    
     name = models.CharField(max_length=200)
     metric_type = models.CharField(max_length=30, choices=METRIC_TYPES)
     description = models.TextField(blank=True)
@@ -255,6 +297,29 @@ class AnalyticsMetric(models.Model):
         default='daily'
     )
     
+    # Computed by the database from the values above
+    trend = models.GeneratedField(
+        expression=models.Case(
+            models.When(current_value__gt=models.F('previous_value'), then=models.Value('up')),
+            models.When(current_value__lt=models.F('previous_value'), then=models.Value('down')),
+            default=models.Value('stable')
+        ),
+        output_field=models.CharField(max_length=8, choices=TREND_CHOICES),
+        db_persist=True
+    )
+    # Wide enough for the largest ratio of two numeric(10,2) values, times 100
+    target_achievement = models.GeneratedField(
+        expression=models.Case(
+            models.When(
+                ~models.Q(target_value=0),
+                then=Round(models.F('current_value') * models.Value(Decimal('100')) / models.F('target_value'), 2)
+            ),
+            default=None
+        ),
+        output_field=models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True),
+        db_persist=True
+    )
+    
     last_calculated = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -271,20 +336,23 @@ class AnalyticsMetric(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.current_value} {self.unit})"
+
+
+class AttendanceDailyAgg(models.Model):
+    """
+    Daily attendance totals per status, refreshed from the attendance table
+    """
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    hours_count = models.PositiveIntegerField(default=0, help_text="Records with hours worked")
+    total_hours = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    refreshed_at = models.DateTimeField()
     
-    @property
-    def trend(self):
-        """Calculate trend compared to previous value"""
-        if self.current_value is not None and self.previous_value is not None:
-            if self.current_value > self.previous_value:
-                return 'up'
-            elif self.current_value < self.previous_value:
-                return 'down'
-        return 'stable'
+    class Meta:
+        db_table = 'reports_attendance_daily_agg'
+        ordering = ['date', 'status']
+        unique_together = ['date', 'status']
     
-    @property
-    def target_achievement(self):
-        """Calculate percentage of target achievement"""
-        if self.current_value is not None and self.target_value is not None and self.target_value != 0:
-            return (self.current_value / self.target_value) * 100
-        return None
+    def __str__(self):
+        return f"{self.date} {self.status}: {self.count}"
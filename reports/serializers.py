@@ -5,11 +5,40 @@ from .models import ReportTemplate, ReportExecution, Dashboard, AnalyticsMetric
 User = get_user_model()
 
 
+# Choice tuples shared by the report parameter serializers
+_REPORT_FORMAT_CHOICES = (('pdf', 'PDF'), ('csv', 'CSV'), ('json', 'JSON'))
+_STREAMING_REPORT_FORMAT_CHOICES = _REPORT_FORMAT_CHOICES + (('ndjson', 'NDJSON'),)
+_ATTENDANCE_STATUS_CHOICES = (('present', 'Present'), ('absent', 'Absent'), ('late', 'Late'))
+_LEAVE_STATUS_CHOICES = (('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'))
+_PAYROLL_STATUS_CHOICES = (('draft', 'Draft'), ('approved', 'Approved'), ('paid', 'Paid'))
+_SHIFT_STATUS_CHOICES = (('scheduled', 'Scheduled'), ('completed', 'Completed'), ('cancelled', 'Cancelled'))
+_ANALYTICS_PERIOD_CHOICES = (('day', 'Daily'), ('week', 'Weekly'), ('month', 'Monthly'), ('year', 'Yearly'))
+
+
+# Choice labels keyed by value, looked up per row instead of get_FOO_display()
+_REPORT_TYPE_DISPLAY = dict(ReportTemplate.REPORT_TYPES)
+_FORMAT_TYPE_DISPLAY = dict(ReportTemplate.FORMAT_TYPES)
+_EXECUTION_STATUS_DISPLAY = dict(ReportExecution.STATUS_CHOICES)
+_DASHBOARD_TYPE_DISPLAY = dict(Dashboard.DASHBOARD_TYPES)
+_METRIC_TYPE_DISPLAY = dict(AnalyticsMetric.METRIC_TYPES)
+
+
+class ChoiceDisplayField(serializers.ReadOnlyField):
+    """Read-only label for a choice field using a prebuilt lookup"""
+    
+    def __init__(self, labels, **kwargs):
+        self.labels = labels
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        return self.labels.get(value, value)
+
+
 class ReportTemplateSerializer(serializers.ModelSerializer):
     """Serializer for ReportTemplate model"""
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
-    format_type_display = serializers.CharField(source='get_format_type_display', read_only=True)
+    report_type_display = ChoiceDisplayField(_REPORT_TYPE_DISPLAY, source='report_type')
+    format_type_display = ChoiceDisplayField(_FORMAT_TYPE_DISPLAY, source='format_type')
     
     class Meta:
         model = ReportTemplate
@@ -22,15 +51,32 @@ class ReportTemplateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
 
 
+class ReportTemplateListSerializer(serializers.ModelSerializer):
+    """Lightweight serializer for template lists, without the JSON configuration"""
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    report_type_display = ChoiceDisplayField(_REPORT_TYPE_DISPLAY, source='report_type')
+    format_type_display = ChoiceDisplayField(_FORMAT_TYPE_DISPLAY, source='format_type')
+    
+    class Meta:
+        model = ReportTemplate
+        fields = [
+            'id', 'name', 'report_type', 'report_type_display', 'format_type',
+            'format_type_display', 'is_public', 'created_by', 'created_by_name',
+            'created_at', 'is_active'
+        ]
+        read_only_fields = fields
+
+
 class ReportTemplateCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating report templates"""
     
     class Meta:
         model = ReportTemplate
         fields = [
-            'name', 'description', 'report_type', 'format_type', 'fields',
+            'id', 'name', 'description', 'report_type', 'format_type', 'fields',
             'filters', 'grouping', 'sorting', 'is_public', 'allowed_roles'
         ]
+        read_only_fields = ['id']
     
     def validate_fields(self, value):
         """Validate fields configuration"""
@@ -49,9 +95,9 @@ class ReportExecutionSerializer(serializers.ModelSerializer):
     """Serializer for ReportExecution model"""
     template_name = serializers.CharField(source='template.name', read_only=True)
     requested_by_name = serializers.CharField(source='requested_by.get_full_name', read_only=True)
-    status_display = serializers.CharField(source='get_status_display', read_only=True)
-    report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
-    format_type_display = serializers.CharField(source='get_format_type_display', read_only=True)
+    status_display = ChoiceDisplayField(_EXECUTION_STATUS_DISPLAY, source='status')
+    report_type_display = ChoiceDisplayField(_REPORT_TYPE_DISPLAY, source='report_type')
+    format_type_display = ChoiceDisplayField(_FORMAT_TYPE_DISPLAY, source='format_type')
     is_expired = serializers.BooleanField(read_only=True)
     
     class Meta:
@@ -77,9 +123,10 @@ class ReportExecutionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReportExecution
         fields = [
-            'template', 'name', 'report_type', 'format_type', 'parameters',
+            'id', 'template', 'name', 'report_type', 'format_type', 'parameters',
             'filters', 'is_public', 'expires_at'
         ]
+        read_only_fields = ['id']
     
     def validate_template(self, value):
         """Validate template exists and is active"""
@@ -91,7 +138,7 @@ class ReportExecutionCreateSerializer(serializers.ModelSerializer):
 class DashboardSerializer(serializers.ModelSerializer):
     """Serializer for Dashboard model"""
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    dashboard_type_display = serializers.CharField(source='get_dashboard_type_display', read_only=True)
+    dashboard_type_display = ChoiceDisplayField(_DASHBOARD_TYPE_DISPLAY, source='dashboard_type')
     
     class Meta:
         model = Dashboard
@@ -129,9 +176,7 @@ class DashboardCreateSerializer(serializers.ModelSerializer):
 
 class AnalyticsMetricSerializer(serializers.ModelSerializer):
     """Serializer for AnalyticsMetric model"""
-    metric_type_display = serializers.CharField(source='get_metric_type_display', read_only=True)
-    trend = serializers.CharField(read_only=True)
-    target_achievement = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
+    metric_type_display = ChoiceDisplayField(_METRIC_TYPE_DISPLAY, source='metric_type')
     
     class Meta:
         model = AnalyticsMetric
@@ -154,12 +199,12 @@ class AttendanceReportSerializer(serializers.Serializer):
     department = serializers.CharField(required=False, allow_blank=True)
     employee = serializers.IntegerField(required=False, allow_null=True)
     status = serializers.ChoiceField(
-        choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late')],
+        choices=_ATTENDANCE_STATUS_CHOICES,
         required=False,
         allow_blank=True
     )
     format = serializers.ChoiceField(
-        choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('json', 'JSON')],
+        choices=_STREAMING_REPORT_FORMAT_CHOICES,
         default='pdf'
     )
     
@@ -178,12 +223,12 @@ class LeaveReportSerializer(serializers.Serializer):
     employee = serializers.IntegerField(required=False, allow_null=True)
     leave_type = serializers.IntegerField(required=False, allow_null=True)
     status = serializers.ChoiceField(
-        choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')],
+        choices=_LEAVE_STATUS_CHOICES,
         required=False,
         allow_blank=True
     )
     format = serializers.ChoiceField(
-        choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('json', 'JSON')],
+        choices=_STREAMING_REPORT_FORMAT_CHOICES,
         default='pdf'
     )
 
@@ -195,12 +240,12 @@ class PayrollReportSerializer(serializers.Serializer):
     department = serializers.CharField(required=False, allow_blank=True)
     employee = serializers.IntegerField(required=False, allow_null=True)
     status = serializers.ChoiceField(
-        choices=[('draft', 'Draft'), ('approved', 'Approved'), ('paid', 'Paid')],
+        choices=_PAYROLL_STATUS_CHOICES,
         required=False,
         allow_blank=True
     )
     format = serializers.ChoiceField(
-        choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('json', 'JSON')],
+        choices=_REPORT_FORMAT_CHOICES,
         default='pdf'
     )
 
@@ -213,12 +258,12 @@ class ShiftReportSerializer(serializers.Serializer):
     employee = serializers.IntegerField(required=False, allow_null=True)
     shift = serializers.IntegerField(required=False, allow_null=True)
     status = serializers.ChoiceField(
-        choices=[('scheduled', 'Scheduled'), ('completed', 'Completed'), ('cancelled', 'Cancelled')],
+        choices=_SHIFT_STATUS_CHOICES,
         required=False,
         allow_blank=True
     )
     format = serializers.ChoiceField(
-        choices=[('pdf', 'PDF'), ('csv', 'CSV'), ('json', 'JSON')],
+        choices=_REPORT_FORMAT_CHOICES,
         default='pdf'
     )
 
@@ -234,7 +279,7 @@ class DashboardDataSerializer(serializers.Serializer):
 class AnalyticsDataSerializer(serializers.Serializer):
     """Serializer for analytics data"""
     period = serializers.ChoiceField(
-        choices=[('day', 'Daily'), ('week', 'Weekly'), ('month', 'Monthly'), ('year', 'Yearly')],
+        choices=_ANALYTICS_PERIOD_CHOICES,
         default='month'
     )
     metric_types = serializers.ListField(
@@ -244,3 +289,4 @@ class AnalyticsDataSerializer(serializers.Serializer):
     department = serializers.CharField(required=False, allow_blank=True)
     start_date = serializers.DateField(required=False)
     end_date = serializers.DateField(required=False)
+    top_n = serializers.IntegerField(required=False, min_value=1, max_value=100)
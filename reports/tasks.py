@@ -0,0 +1,53 @@
+"""
+Background tasks for reports and analytics
+"""
+
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ReportExecution
+from .utils import execute_report, refresh_attendance_daily_agg
+
+logger = logging.getLogger(__name__)
+
+# Days re-aggregated on each run so late edits to attendance are picked up
+ATTENDANCE_AGG_LOOKBACK_DAYS = 7
+
+
+@shared_task
+def refresh_attendance_daily_agg_task(days=ATTENDANCE_AGG_LOOKBACK_DAYS):
+    """Refresh daily attendance aggregates for the recent closed days"""
+    end_date = timezone.now().date() - timedelta(days=1)
+    start_date = end_date - timedelta(days=days - 1)
+    return refresh_attendance_daily_agg(start_date, end_date)
+
+
+@shared_task
+def execute_report_task(execution_id):
+    """Generate the report file for a queued execution"""
+    execution = ReportExecution.objects.get(id=execution_id)
+    execute_report(execution)
+    return execution.status
+
+
+def queue_report_execution(execution):
+    """Queue report generation once the execution row commits, failing it if the broker is down"""
+    execution_id = execution.id
+    
+    def queue():
+        try:
+            execute_report_task.delay(execution_id)
+        except Exception as e:
+            # The execution is already committed; leave it in a terminal state for polling clients
+            logger.exception('Could not queue report execution %s', execution_id)
+            ReportExecution.objects.filter(pk=execution_id).update(
+                status='failed',
+                error_message=f'Could not queue report generation: {e}',
+                completed_at=timezone.now()
+            )
+    
+    transaction.on_commit(queue)
@@ -1,21 +1,66 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
+import csv
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from decimal import Decimal
 from datetime import datetime, timedelta
+from unittest import mock
 from django.utils import timezone
 
-from .models import ReportTemplate, ReportExecution, Dashboard, AnalyticsMetric
+from .cache import analytics_cache
+from .models import ReportTemplate, ReportExecution, Dashboard, AnalyticsMetric, AttendanceDailyAgg
 from attendance.models import Attendance
 from leave.models import LeaveRequest, LeaveType
 
 User = get_user_model()
 
 
+def _make_attendance(user, n_days, end_date=None, **fields):
+    """Bulk-create one attendance record per day for the n_days ending on end_date"""
+    end_date = end_date or timezone.now().date()
+    fields.setdefault('status', 'present')
+    fields.setdefault('hours_worked', 8.0)
+    return Attendance.objects.bulk_create(
+        [
+            Attendance(user=user, date=end_date - timedelta(days=offset), **fields)
+            for offset in range(n_days)
+        ],
+        batch_size=500
+    )
+
+
+class ViewQueriesMixin:
+    """assertNumQueries for API requests, leaving out session bookkeeping"""
+    
+    @contextmanager
+    def assertViewQueries(self, num):
+        # SessionSecurityMiddleware stores last_activity on every authenticated
+        # request, so each response saves the session inside a savepoint
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if 'django_session' not in query['sql'] and 'SAVEPOINT' not in query['sql'].upper()
+        ]
+        self.assertEqual(
+            len(queries), num,
+            f"{len(queries)} view queries executed, {num} expected\n" + '\n'.join(queries)
+        )
+
+
 class ReportTemplateModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123',
@@ -40,19 +85,20 @@ class ReportTemplateModelTest(TestCase):
 
 
 class ReportExecutionModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123',
             role='hr'
         )
         
-        self.template = ReportTemplate.objects.create(
+        cls.template = ReportTemplate.objects.create(
             name='Test Template',
             report_type='attendance',
             format_type='csv',
-            created_by=self.user
+            created_by=cls.user
         )
 
     def test_create_report_execution(self):
@@ -81,28 +127,64 @@ class ReportExecutionModelTest(TestCase):
         )
         
         self.assertTrue(execution.is_expired)
+        
+        annotated = ReportExecution.objects.with_expiry().get(pk=execution.pk)
+        self.assertTrue(annotated.is_expired)
+        self.assertEqual(list(ReportExecution.objects.expired()), [execution])
 
+    def test_mark_as_downloaded(self):
+        execution = ReportExecution.objects.create(
+            template=self.template,
+            name='Downloaded Execution',
+            report_type='attendance',
+            format_type='csv',
+            requested_by=self.user
+        )
+        stale = ReportExecution.objects.get(pk=execution.pk)
+        
+        execution.mark_as_downloaded()
+        stale.mark_as_downloaded()
+        
+        execution.refresh_from_db()
+        self.assertEqual(execution.download_count, 2)
 
-class ReportAPITest(APITestCase):
-    def setUp(self):
-        self.hr_user = User.objects.create_user(
+
+class ReportAPITest(ViewQueriesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr_user = User.objects.create_user(
             username='hruser',
             email='hr@example.com',
             password='testpass123',
             role='hr'
         )
         
-        self.employee_user = User.objects.create_user(
+        cls.employee_user = User.objects.create_user(
             username='employee',
             email='employee@example.com',
             password='testpass123',
             role='employee'
         )
+        
+        cls.TEMPLATE_URL = reverse('reports:report-template-list')
+        cls.ATTENDANCE_REPORT_URL = reverse('reports:generate-attendance-report')
+        cls.ANALYTICS_URL = reverse('reports:analytics-data')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Authenticated clients shared by every test in the class
+        cls.hr_client = APIClient()
+        cls.hr_client.force_authenticate(user=cls.hr_user)
+        cls.employee_client = APIClient()
+        cls.employee_client.force_authenticate(user=cls.employee_user)
+
+    def setUp(self):
+        # Cached analytics outlive the per-test rollback
+        analytics_cache.clear()
 
     def test_create_report_template_as_hr(self):
         """Test HR user can create report templates"""
-        self.client.force_authenticate(user=self.hr_user)
-        
         data = {
             'name': 'Attendance Report',
             'description': 'Monthly attendance report',
@@ -112,14 +194,20 @@ class ReportAPITest(APITestCase):
             'is_public': True
         }
         
-        response = self.client.post(reverse('report-template-list'), data, format='json')
+        response = self.hr_client.post(self.TEMPLATE_URL, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(ReportTemplate.objects.count(), 1)
+        
+        # List responses leave out the JSON configuration
+        response = self.hr_client.get(self.TEMPLATE_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(results[0]['name'], 'Attendance Report')
+        self.assertNotIn('fields', results[0])
+        self.assertNotIn('filters', results[0])
 
     def test_create_report_template_as_employee(self):
         """Test employee user has limited access"""
-        self.client.force_authenticate(user=self.employee_user)
-        
         data = {
             'name': 'Personal Report',
             'report_type': 'attendance',
@@ -127,7 +215,7 @@ class ReportAPITest(APITestCase):
             'is_public': False
         }
         
-        response = self.client.post(reverse('report-template-list'), data, format='json')
+        response = self.employee_client.post(self.TEMPLATE_URL, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         
         template = ReportTemplate.objects.first()
@@ -136,8 +224,6 @@ class ReportAPITest(APITestCase):
 
     def test_generate_attendance_report(self):
         """Test quick attendance report generation"""
-        self.client.force_authenticate(user=self.hr_user)
-        
         # Create some test attendance data
         Attendance.objects.create(
             user=self.employee_user,
@@ -152,24 +238,150 @@ class ReportAPITest(APITestCase):
             'format': 'json'
         }
         
-        response = self.client.post(reverse('generate-attendance-report'), data, format='json')
+        # The count comes from the fetched rows
+        with self.assertViewQueries(1):
+            response = self.hr_client.post(self.ATTENDANCE_REPORT_URL, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('data', response.data)
         self.assertIn('count', response.data)
+        self.assertFalse(response.data['truncated'])
+
+    def test_generate_attendance_report_ndjson(self):
+        """Test attendance reports can be streamed as NDJSON"""
+        _make_attendance(self.employee_user, 2)
+        
+        data = {
+            'start_date': (timezone.now().date() - timedelta(days=7)).isoformat(),
+            'end_date': timezone.now().date().isoformat(),
+            'format': 'ndjson'
+        }
+        
+        response = self.hr_client.post(self.ATTENDANCE_REPORT_URL, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['status'], 'present')
+
+    def test_generate_attendance_report_csv(self):
+        """Test attendance CSV reports are streamed row by row"""
+        _make_attendance(self.employee_user, 2)
+        
+        data = {
+            'start_date': (timezone.now().date() - timedelta(days=7)).isoformat(),
+            'end_date': timezone.now().date().isoformat(),
+            'format': 'csv'
+        }
+        
+        response = self.hr_client.post(self.ATTENDANCE_REPORT_URL, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        
+        # Employee names come from the same joined query as the rows
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(rows[0][0], 'Employee')
+        self.assertEqual(rows[1][0], f"{self.employee_user.first_name} {self.employee_user.last_name}")
+        self.assertEqual(len(rows), 3)
+
+    def test_generate_attendance_report_pdf(self):
+        """Test PDF reports are sent from a temporary file, not the reports directory"""
+        _make_attendance(self.employee_user, 2)
+        
+        data = {
+            'start_date': (timezone.now().date() - timedelta(days=7)).isoformat(),
+            'end_date': timezone.now().date().isoformat(),
+            'format': 'pdf'
+        }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir, override_settings(MEDIA_ROOT=tmp_dir):
+            response = self.hr_client.post(self.ATTENDANCE_REPORT_URL, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.streaming)
+            self.assertIn('attachment', response['Content-Disposition'])
+            self.assertTrue(b''.join(response.streaming_content))
+            response.close()
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_dashboard_data(self):
+        """Test dashboard data loads the dashboard and its creator together"""
+        dashboard = Dashboard.objects.create(
+            name='Team Overview',
+            dashboard_type='hr',
+            widgets=[{'type': 'attendance_summary', 'title': 'Attendance'}],
+            created_by=self.hr_user
+        )
+        
+        # Dashboard with creator, then the attendance summary
+        with self.assertViewQueries(2):
+            response = self.hr_client.get(
+                reverse('reports:dashboard-data', kwargs={'dashboard_id': dashboard.id})
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['dashboard']['created_by_name'], self.hr_user.get_full_name())
+        self.assertEqual(len(response.data['widgets']), 1)
 
     def test_analytics_data(self):
         """Test analytics endpoint"""
-        self.client.force_authenticate(user=self.hr_user)
-        
-        response = self.client.get(reverse('analytics-data'))
+        # One query per empty section plus two employee queries
+        with self.assertViewQueries(6):
+            response = self.hr_client.get(self.ANALYTICS_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('attendance_metrics', response.data)
         self.assertIn('leave_metrics', response.data)
+        
+        # Repeat requests are served from the cache
+        with self.assertViewQueries(0):
+            cached_response = self.hr_client.get(self.ANALYTICS_URL)
+        self.assertEqual(cached_response.data, response.data)
+        
+        # Attendance changes expire cached payloads
+        Attendance.objects.create(
+            user=self.employee_user,
+            date=timezone.now().date(),
+            status='present',
+            hours_worked=8.0
+        )
+        response = self.hr_client.get(self.ANALYTICS_URL)
+        self.assertEqual(response.data['attendance_metrics']['total_records'], 1)
+
+    def test_attendance_analytics(self):
+        """Test attendance analytics totals come from the status summary"""
+        _make_attendance(self.employee_user, 1)
+        _make_attendance(self.hr_user, 1, status='late')
+        
+        # Status and daily summaries share one GROUP BY, plus departments
+        with self.assertViewQueries(2):
+            response = self.hr_client.get(reverse('reports:attendance-analytics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_records'], 2)
+        self.assertEqual(
+            response.data['status_summary'],
+            [{'status': 'late', 'count': 1}, {'status': 'present', 'count': 1}]
+        )
+        self.assertEqual(response.data['daily_trends'][0]['present'], 1)
+
+    def test_attendance_analytics_date_range(self):
+        """Test attendance analytics honours ISO date range parameters"""
+        _make_attendance(self.employee_user, 1)
+        yesterday = (timezone.now().date() - timedelta(days=1)).isoformat()
+        
+        url = reverse('reports:attendance-analytics')
+        response = self.hr_client.get(url, {'start_date': yesterday, 'end_date': yesterday})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_records'], 0)
+        
+        response = self.hr_client.get(url, {'start_date': '16/10/2026'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': 'start_date and end_date must be YYYY-MM-DD dates'})
 
 
 class DashboardModelTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123',
@@ -242,45 +454,112 @@ class AnalyticsMetricModelTest(TestCase):
         )
         self.assertEqual(metric_stable.trend, 'stable')
 
+    def test_metric_derived_fields_stored(self):
+        metric = AnalyticsMetric.objects.create(
+            name='Stored',
+            metric_type='custom',
+            current_value=50,
+            previous_value=40,
+            target_value=100
+        )
+        self.assertTrue(AnalyticsMetric.objects.filter(id=metric.id, trend='up').exists())
+        
+        metric.current_value = 30
+        metric.save(update_fields=['current_value'])
+        metric.refresh_from_db()
+        self.assertEqual(metric.trend, 'down')
+        self.assertEqual(metric.target_achievement, Decimal('30.00'))
+
 
 class ReportUtilsTest(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
             password='testpass123',
             role='employee'
         )
 
+    def setUp(self):
+        # Cached analytics outlive the per-test rollback
+        analytics_cache.clear()
+
     def test_calculate_attendance_metrics(self):
         """Test attendance metrics calculation"""
         from .utils import calculate_attendance_metrics
         
         # Create test attendance data
         today = timezone.now().date()
-        Attendance.objects.create(
-            user=self.user,
-            date=today,
-            status='present',
-            hours_worked=8.0
-        )
-        Attendance.objects.create(
-            user=self.user,
-            date=today - timedelta(days=1),
-            status='late',
-            hours_worked=7.5
-        )
+        _make_attendance(self.user, 1)
+        _make_attendance(self.user, 1, end_date=today - timedelta(days=1), status='late', hours_worked=7.5)
         
-        metrics = calculate_attendance_metrics(
-            today - timedelta(days=7),
-            today
-        )
+        # Totals plus one GROUP BY for status and daily trends
+        with self.assertNumQueries(2):
+            metrics = calculate_attendance_metrics(
+                today - timedelta(days=7),
+                today
+            )
         
         self.assertIn('total_records', metrics)
         self.assertIn('attendance_rate', metrics)
         self.assertIn('status_distribution', metrics)
         self.assertEqual(metrics['total_records'], 2)
 
+    def test_calculate_leave_metrics(self):
+        """Test leave metrics totals and the leave type distribution"""
+        from .utils import calculate_leave_metrics
+        
+        leave_type = LeaveType.objects.create(name='Annual Leave', max_days_per_year=20)
+        start = datetime(2026, 10, 12).date()
+        LeaveRequest.objects.bulk_create([
+            LeaveRequest(
+                user=self.user, leave_type=leave_type, start_date=start,
+                end_date=start + timedelta(days=1), total_days=2, reason='Trip', status='approved'
+            ),
+            LeaveRequest(
+                user=self.user, leave_type=leave_type, start_date=start + timedelta(days=2),
+                end_date=start + timedelta(days=5), total_days=4, reason='Rest', status='pending'
+            ),
+        ])
+        
+        metrics = calculate_leave_metrics(start, start + timedelta(days=6))
+        
+        self.assertEqual(metrics['total_requests'], 2)
+        self.assertEqual(metrics['approval_rate'], 50.0)
+        self.assertEqual(metrics['days_summary'], {'total_days': 6, 'average_days': 3.0})
+        self.assertEqual(
+            metrics['leave_type_distribution'],
+            [{'leave_type__name': 'Annual Leave', 'count': 2, 'total_days': 6}]
+        )
+
+    def test_employee_metrics_top_n(self):
+        """Test distributions are capped in the database, largest first"""
+        from .utils import calculate_employee_metrics
+        
+        User.objects.create_user(username='manager1', password='testpass123', role='manager')
+        User.objects.create_user(username='employee2', password='testpass123', role='employee')
+        today = timezone.now().date()
+        
+        metrics = calculate_employee_metrics(today, today, top_n=1)
+        
+        self.assertEqual(metrics['role_distribution'], [{'role': 'employee', 'count': 2}])
+
+    def test_attendance_report_queryset_filters(self):
+        """Test execution filters that are set become lookups in one filter() call"""
+        from .utils import attendance_report_queryset
+        
+        today = timezone.now().date()
+        _make_attendance(self.user, 3)
+        
+        rows = attendance_report_queryset({
+            'start_date': (today - timedelta(days=1)).isoformat(),
+            'status': 'present',
+            'department': ''
+        })
+        
+        self.assertEqual(len(rows), 2)
+
     def test_create_dashboard_widgets(self):
         """Test dashboard widget creation"""
         from .utils import create_dashboard_widgets
@@ -296,18 +575,174 @@ class ReportUtilsTest(TestCase):
         self.assertEqual(widget_data['type'], 'attendance_summary')
         self.assertEqual(widget_data['title'], 'My Attendance')
         self.assertIn('data', widget_data)
+    
+    def test_attendance_chart_data(self):
+        """Test chart data comes from a single grouped query"""
+        from .utils import generate_attendance_chart_data
+        
+        _make_attendance(self.user, 2)
+        
+        with self.assertNumQueries(1):
+            chart = generate_attendance_chart_data('line', 'week', self.user)
+        
+        self.assertEqual(len(chart['labels']), 8)
+        present = chart['datasets'][0]['data']
+        self.assertEqual(present[-2:], [1, 1])
+        self.assertEqual(sum(present), 2)
+        
+        # Chart types without series never touch the database
+        with self.assertNumQueries(0):
+            bar_chart = generate_attendance_chart_data('bar', 'week', self.user)
+        self.assertEqual(bar_chart['labels'], chart['labels'])
+        self.assertEqual(bar_chart['datasets'], [])
 
+    def test_write_queryset_csv(self):
+        """Test CSV exports are written straight from a values() queryset"""
+        from .utils import write_queryset_csv
+        
+        _make_attendance(self.user, 3)
+        queryset = Attendance.objects.values('date', 'status')
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'attendance.csv')
+            self.assertEqual(write_queryset_csv(queryset, file_path), 3)
+            with open(file_path, newline='', encoding='utf-8') as csvfile:
+                rows = list(csv.reader(csvfile))
+        
+        self.assertEqual(rows[0], ['date', 'status'])
+        self.assertEqual(len(rows), 4)
 
-class ReportGenerationIntegrationTest(APITestCase):
-    def setUp(self):
-        self.hr_user = User.objects.create_user(
+    def test_write_queryset_json(self):
+        """Test JSON exports stream a values() queryset into one document"""
+        from .utils import write_queryset_json
+        
+        _make_attendance(self.user, 3)
+        queryset = Attendance.objects.values('date', 'status')
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'attendance.json')
+            self.assertEqual(write_queryset_json(queryset, 'attendance', file_path), 3)
+            with open(file_path, encoding='utf-8') as jsonfile:
+                report = json.load(jsonfile)
+        
+        self.assertEqual(report['report_type'], 'attendance')
+        self.assertEqual(report['total_records'], 3)
+        self.assertEqual(set(report['data'][0]), {'date', 'status'})
+
+    def test_build_dashboard(self):
+        """Test dashboard widgets share one query per data source"""
+        from .utils import build_dashboard
+        
+        widgets = [
+            {'type': 'attendance_summary', 'title': 'My Attendance'},
+            {'type': 'attendance_summary', 'title': 'Attendance Again'},
+            {'type': 'leave_summary', 'title': 'My Leave'},
+            {'type': 'shift_summary', 'title': 'My Shifts'},
+        ]
+        _make_attendance(self.user, 1)
+        
+        with self.assertNumQueries(3):
+            widgets_data = build_dashboard(widgets, self.user)
+        
+        self.assertEqual([w['title'] for w in widgets_data], [w['title'] for w in widgets])
+        self.assertEqual(widgets_data[0]['data'], widgets_data[1]['data'])
+        self.assertEqual(widgets_data[0]['data']['present'], 1)
+        self.assertEqual(widgets_data[0]['data']['week']['present'], 1)
+        self.assertEqual(widgets_data[2]['data']['total'], 0)
+    
+    def test_summary_widget_cache_shared_by_role(self):
+        """Test privileged users share widget data while employees keep their own"""
+        from .utils import attendance_summary_data
+        
+        hr_one = User.objects.create_user(username='hr_one', password='testpass123', role='hr')
+        hr_two = User.objects.create_user(username='hr_two', password='testpass123', role='hr')
+        
+        with self.assertNumQueries(1):
+            data = attendance_summary_data(hr_one)
+        with self.assertNumQueries(0):
+            self.assertEqual(attendance_summary_data(hr_two), data)
+        with self.assertNumQueries(1):
+            attendance_summary_data(self.user)
+
+    def test_create_dashboard_widgets_from_list(self):
+        """Test a list of widget configs is routed to the bulk builder"""
+        from .utils import create_dashboard_widgets
+        
+        widgets = [
+            {'type': 'attendance_summary', 'title': 'My Attendance'},
+            {'type': 'attendance_summary', 'title': 'Attendance Again'},
+        ]
+        
+        with self.assertNumQueries(1):
+            widgets_data = create_dashboard_widgets(widgets, self.user)
+        
+        self.assertEqual(len(widgets_data), 2)
+
+    def test_attendance_metrics_from_daily_agg(self):
+        """Test closed ranges are served from the daily aggregates"""
+        from .utils import calculate_attendance_metrics, refresh_attendance_daily_agg
+        
+        yesterday = timezone.now().date() - timedelta(days=1)
+        Attendance.objects.create(
+            user=self.user,
+            date=yesterday,
+            status='present',
+            hours_worked=8.0
+        )
+        Attendance.objects.create(
+            user=self.user,
+            date=yesterday - timedelta(days=1),
+            status='late',
+            hours_worked=7.0
+        )
+        
+        self.assertEqual(refresh_attendance_daily_agg(), 2)
+        self.assertEqual(AttendanceDailyAgg.objects.count(), 2)
+        
+        # Aggregated days plus a live GROUP BY over the days missing from them
+        with self.assertNumQueries(2):
+            metrics = calculate_attendance_metrics(yesterday - timedelta(days=7), yesterday)
+        
+        self.assertEqual(metrics['total_records'], 2)
+        self.assertEqual(metrics['attendance_rate'], 100.0)
+        self.assertEqual(metrics['hours_summary']['average_hours'], 7.5)
+        self.assertEqual(len(metrics['daily_trends']), 2)
+        
+        # Stale day/status pairs are dropped on the next refresh
+        Attendance.objects.filter(date=yesterday).delete()
+        refresh_attendance_daily_agg()
+        self.assertEqual(AttendanceDailyAgg.objects.count(), 1)
+        
+        # Edits to an aggregated day refresh its aggregates
+        record = Attendance.objects.get(date=yesterday - timedelta(days=1))
+        record.status = 'present'
+        record.save()
+        self.assertEqual(AttendanceDailyAgg.objects.get().status, 'present')
+        
+        # Days the refresh has not reached are counted from attendance
+        Attendance.objects.bulk_create([
+            Attendance(user=self.user, date=yesterday - timedelta(days=5), status='absent')
+        ])
+        analytics_cache.clear()
+        metrics = calculate_attendance_metrics(yesterday - timedelta(days=7), yesterday)
+        self.assertEqual(metrics['total_records'], 2)
+        self.assertEqual(metrics['status_distribution']['absent'], 1)
+
+
+# Keep integration tests on TestCase/APITestCase. Work deferred with
+# transaction.on_commit is exercised through captureOnCommitCallbacks rather
+# than TransactionTestCase, which truncates every table between tests.
+class ReportGenerationIntegrationTest(ViewQueriesMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr_user = User.objects.create_user(
             username='hruser',
             email='hr@example.com',
             password='testpass123',
             role='hr'
         )
         
-        self.employee_user = User.objects.create_user(
+        cls.employee_user = User.objects.create_user(
             username='employee',
             email='employee@example.com',
             password='testpass123',
@@ -316,30 +751,40 @@ class ReportGenerationIntegrationTest(APITestCase):
         
         # Create test data
         today = timezone.now().date()
-        Attendance.objects.create(
-            user=self.employee_user,
-            date=today,
-            status='present',
-            hours_worked=8.0
-        )
+        _make_attendance(cls.employee_user, 1)
         
         # Create leave type and request
-        leave_type = LeaveType.objects.create(
+        cls.leave_type = LeaveType.objects.create(
             name='Annual Leave',
             max_days_per_year=20
         )
         LeaveRequest.objects.create(
-            user=self.employee_user,
-            leave_type=leave_type,
+            user=cls.employee_user,
+            leave_type=cls.leave_type,
             start_date=today + timedelta(days=1),
             end_date=today + timedelta(days=2),
             total_days=2,
             reason='Personal'
         )
+        
+        cls.TEMPLATE_URL = reverse('reports:report-template-list')
+        cls.EXECUTION_URL = reverse('reports:report-execution-list')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hr_client = APIClient()
+        cls.hr_client.force_authenticate(user=cls.hr_user)
+        
+        # Executions run eagerly and write real report files; keep them out of MEDIA_ROOT
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        cls.addClassCleanup(media_override.disable)
 
     def test_full_report_workflow(self):
         """Test complete report generation workflow"""
-        self.client.force_authenticate(user=self.hr_user)
         
         # 1. Create report template
         template_data = {
@@ -350,11 +795,12 @@ class ReportGenerationIntegrationTest(APITestCase):
             'filters': {}
         }
         
-        template_response = self.client.post(
-            reverse('report-template-list'),
-            template_data,
-            format='json'
-        )
+        with self.assertViewQueries(1):
+            template_response = self.hr_client.post(
+                self.TEMPLATE_URL,
+                template_data,
+                format='json'
+            )
         self.assertEqual(template_response.status_code, status.HTTP_201_CREATED)
         template_id = template_response.data['id']
         
@@ -370,19 +816,81 @@ class ReportGenerationIntegrationTest(APITestCase):
             }
         }
         
-        execution_response = self.client.post(
-            reverse('report-execution-list'),
-            execution_data,
-            format='json'
-        )
+        # Template lookup and insert, then the queued task's execution fetch,
+        # the report rows, and the processing/finished status saves
+        with self.assertViewQueries(6), self.captureOnCommitCallbacks(execute=True):
+            execution_response = self.hr_client.post(
+                self.EXECUTION_URL,
+                execution_data,
+                format='json'
+            )
         self.assertEqual(execution_response.status_code, status.HTTP_201_CREATED)
         
         # 3. Check execution status
         execution_id = execution_response.data['id']
-        detail_response = self.client.get(
-            reverse('report-execution-detail', kwargs={'pk': execution_id})
-        )
+        with self.assertViewQueries(1):
+            detail_response = self.hr_client.get(
+                reverse('reports:report-execution-detail', kwargs={'pk': execution_id})
+            )
         self.assertEqual(detail_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail_response.data['status'], 'completed')
+        self.assertEqual(detail_response.data['record_count'], 1)
         
         # Note: In a real scenario, the report would be processed asynchronously
         # and we'd need to wait for completion before downloading
+
+    def test_execution_fails_when_queueing_fails(self):
+        """Test a broker outage leaves the execution failed rather than pending"""
+        execution_data = {
+            'name': 'Attendance Export',
+            'report_type': 'attendance',
+            'format_type': 'json',
+            'filters': {}
+        }
+        
+        with mock.patch('reports.tasks.execute_report_task.delay', side_effect=ConnectionError('broker down')):
+            with self.assertLogs('reports.tasks', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.hr_client.post(self.EXECUTION_URL, execution_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        execution = ReportExecution.objects.get(pk=response.data['id'])
+        self.assertEqual(execution.status, 'failed')
+        self.assertIn('broker down', execution.error_message)
+
+    def test_leave_report_execution_queries(self):
+        """Test related names in a report export come from the row query itself"""
+        today = timezone.now().date()
+        LeaveRequest.objects.create(
+            user=self.employee_user,
+            leave_type=self.leave_type,
+            start_date=today + timedelta(days=5),
+            end_date=today + timedelta(days=5),
+            total_days=1,
+            reason='Appointment',
+            status='approved',
+            approved_by=self.hr_user,
+            approved_at=timezone.now()
+        )
+        template = ReportTemplate.objects.create(
+            name='Leave Report',
+            report_type='leave',
+            format_type='json',
+            created_by=self.hr_user
+        )
+        execution_data = {
+            'template': template.id,
+            'name': 'Leave Export',
+            'report_type': 'leave',
+            'format_type': 'json',
+            'filters': {}
+        }
+        
+        # Same budget as a one-row export: user, leave type and approver are joined in
+        with self.assertViewQueries(6), self.captureOnCommitCallbacks(execute=True):
+            response = self.hr_client.post(self.EXECUTION_URL, execution_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        execution = ReportExecution.objects.get(pk=response.data['id'])
+        self.assertEqual(execution.status, 'completed')
+        self.assertEqual(execution.record_count, 2)
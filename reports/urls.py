@@ -1,37 +1,41 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
 from . import views
 
 app_name = 'reports'
 
-# Create router for ViewSets
-router = DefaultRouter()
-
+# Patterns are grouped by prefix so the resolver skips whole groups on a mismatch
 urlpatterns = [
     # Report Templates
-    path('templates/', views.ReportTemplateListView.as_view(), name='report-template-list'),
-    path('templates/<int:pk>/', views.ReportTemplateDetailView.as_view(), name='report-template-detail'),
+    path('templates/', include([
+        path('', views.ReportTemplateListView.as_view(), name='report-template-list'),
+        path('<int:pk>/', views.ReportTemplateDetailView.as_view(), name='report-template-detail'),
+    ])),
     
     # Report Executions
-    path('executions/', views.ReportExecutionListView.as_view(), name='report-execution-list'),
-    path('executions/<int:pk>/', views.ReportExecutionDetailView.as_view(), name='report-execution-detail'),
-    path('executions/<int:execution_id>/download/', views.download_report, name='download-report'),
+    path('executions/', include([
+        path('', views.ReportExecutionListView.as_view(), name='report-execution-list'),
+        path('<int:pk>/', views.ReportExecutionDetailView.as_view(), name='report-execution-detail'),
+        path('<int:execution_id>/download/', views.download_report, name='download-report'),
+    ])),
     
     # Quick Report Generation
-    path('generate/attendance/', views.generate_attendance_report, name='generate-attendance-report'),
-    path('generate/leave/', views.generate_leave_report, name='generate-leave-report'),
+    path('generate/', include([
+        path('attendance/', views.generate_attendance_report, name='generate-attendance-report'),
+        path('leave/', views.generate_leave_report, name='generate-leave-report'),
+    ])),
     
     # Dashboard Management
-    path('dashboards/', views.DashboardListView.as_view(), name='dashboard-list'),
-    path('dashboards/<int:dashboard_id>/data/', views.dashboard_data, name='dashboard-data'),
+    path('dashboards/', include([
+        path('', views.DashboardListView.as_view(), name='dashboard-list'),
+        path('<int:dashboard_id>/data/', views.dashboard_data, name='dashboard-data'),
+    ])),
     
     # Analytics & Metrics
     path('metrics/', views.AnalyticsMetricListView.as_view(), name='analytics-metric-list'),
-    path('analytics/', views.analytics_data, name='analytics-data'),
-    path('analytics/attendance/', views.attendance_analytics, name='attendance-analytics'),
-    
-    # Include router URLs
-    path('', include(router.urls)),
+    path('analytics/', include([
+        path('', views.analytics_data, name='analytics-data'),
+        path('attendance/', views.attendance_analytics, name='attendance-analytics'),
+    ])),
     
     # Additional URL patterns for template compatibility
     path('team-report/', views.generate_team_report_web, name='team_report'),
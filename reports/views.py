@@ -3,7 +3,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
-from django.db.models import Q, Count, Sum, Avg, F, Case, When, IntegerField
+from django.db.models import Q, Count, Sum, Avg, F, FloatField
+from django.db.models.functions import Round
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 try:
@@ -11,16 +12,17 @@ try:
 except ImportError:
     DjangoFilterBackend = None
 from rest_framework import filters
-from datetime import datetime, timedelta
-from django.http import HttpResponse, FileResponse
+from datetime import date, timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 import csv
 import json
-from io import StringIO, BytesIO
+import tempfile
 from decimal import Decimal
 
 from .models import ReportTemplate, ReportExecution, Dashboard, AnalyticsMetric
 from .serializers import (
-    ReportTemplateSerializer, ReportTemplateCreateSerializer,
+    ReportTemplateSerializer, ReportTemplateListSerializer, ReportTemplateCreateSerializer,
     ReportExecutionSerializer, ReportExecutionCreateSerializer,
     DashboardSerializer, DashboardCreateSerializer,
     AnalyticsMetricSerializer, AttendanceReportSerializer,
@@ -30,18 +32,18 @@ from .serializers import (
 from users.models import User
 from attendance.models import Attendance
 from leave.models import LeaveRequest, LeaveBalance
-from payroll.models import Payroll
-from shifts.models import ShiftSchedule
+from .cache import cached_analytics, get_analytics_version
+from .tasks import queue_report_execution
 from .utils import (
     generate_pdf_report, generate_csv_report, calculate_analytics_metrics,
-    create_dashboard_widgets, export_report_data
+    build_dashboard, write_pdf_report
 )
 
 
 # Report Templates Management
 class ReportTemplateListView(generics.ListCreateAPIView):
     """List and create report templates"""
-    queryset = ReportTemplate.objects.filter(is_active=True)
+    queryset = ReportTemplate.objects.filter(is_active=True).select_related('created_by')
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter] if DjangoFilterBackend else [filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['report_type', 'format_type', 'is_public'] if DjangoFilterBackend else []
@@ -49,15 +51,22 @@ class ReportTemplateListView(generics.ListCreateAPIView):
     ordering_fields = ['name', 'created_at', 'report_type']
     ordering = ['-created_at']
 
+    # Columns read by ReportTemplateListSerializer
+    list_fields = [
+        'id', 'name', 'report_type', 'format_type', 'is_public', 'created_at',
+        'is_active', 'created_by__id', 'created_by__first_name',
+        'created_by__last_name', 'created_by__username'
+    ]
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ReportTemplateCreateSerializer
-        return ReportTemplateSerializer
+        return ReportTemplateListSerializer
 
     def get_queryset(self):
         """Filter templates based on user permissions"""
         user = self.request.user
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().only(*self.list_fields)
         
         if user.role in ['hr', 'manager']:
             return queryset
@@ -77,7 +86,7 @@ class ReportTemplateListView(generics.ListCreateAPIView):
 
 class ReportTemplateDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update, or delete report template"""
-    queryset = ReportTemplate.objects.filter(is_active=True)
+    queryset = ReportTemplate.objects.filter(is_active=True).select_related('created_by')
     serializer_class = ReportTemplateSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -110,7 +119,7 @@ class ReportExecutionListView(generics.ListCreateAPIView):
     def get_queryset(self):
         """Return user's report executions"""
         user = self.request.user
-        queryset = ReportExecution.objects.all()
+        queryset = ReportExecution.objects.select_related('template', 'requested_by').with_expiry()
         
         if user.role in ['hr', 'manager']:
             return queryset
@@ -118,151 +127,12 @@ class ReportExecutionListView(generics.ListCreateAPIView):
             return queryset.filter(Q(requested_by=user) | Q(is_public=True))
 
     def perform_create(self, serializer):
-        """Create and execute report"""
+        """Create the execution and queue it for generation"""
         user = self.request.user
         execution = serializer.save(requested_by=user)
         
-        # Execute report asynchronously (for now, execute immediately)
-        self.execute_report(execution)
-
-    def execute_report(self, execution):
-        """Execute the report generation"""
-        try:
-            execution.status = 'processing'
-            execution.started_at = timezone.now()
-            execution.save()
-
-            # Generate report based on type
-            if execution.report_type == 'attendance':
-                data = self.generate_attendance_report(execution)
-            elif execution.report_type == 'leave':
-                data = self.generate_leave_report(execution)
-            elif execution.report_type == 'payroll':
-                data = self.generate_payroll_report(execution)
-            elif execution.report_type == 'shift':
-                data = self.generate_shift_report(execution)
-            else:
-                raise ValueError(f"Unknown report type: {execution.report_type}")
-
-            # Export data to file
-            file_path = export_report_data(data, execution)
-            
-            execution.status = 'completed'
-            execution.completed_at = timezone.now()
-            execution.file_path = file_path
-            execution.record_count = len(data) if isinstance(data, list) else 1
-            execution.generation_time = execution.completed_at - execution.started_at
-            execution.save()
-
-        except Exception as e:
-            execution.status = 'failed'
-            execution.error_message = str(e)
-            execution.completed_at = timezone.now()
-            execution.save()
-
-    def generate_attendance_report(self, execution):
-        """Generate attendance report data"""
-        params = execution.parameters
-        filters = execution.filters
-        
-        queryset = Attendance.objects.all()
-        
-        # Apply filters
-        if filters.get('start_date'):
-            queryset = queryset.filter(date__gte=filters['start_date'])
-        if filters.get('end_date'):
-            queryset = queryset.filter(date__lte=filters['end_date'])
-        if filters.get('department'):
-            queryset = queryset.filter(user__department=filters['department'])
-        if filters.get('employee'):
-            queryset = queryset.filter(user_id=filters['employee'])
-        if filters.get('status'):
-            queryset = queryset.filter(status=filters['status'])
-
-        return list(queryset.values(
-            'id', 'user__first_name', 'user__last_name', 'user__employee_id',
-            'date', 'check_in_time', 'check_out_time', 'status', 'hours_worked',
-            'overtime_hours', 'attendance_type', 'notes'
-        ))
-
-    def generate_leave_report(self, execution):
-        """Generate leave report data"""
-        filters = execution.filters
-        
-        queryset = LeaveRequest.objects.all()
-        
-        # Apply filters
-        if filters.get('start_date'):
-            queryset = queryset.filter(start_date__gte=filters['start_date'])
-        if filters.get('end_date'):
-            queryset = queryset.filter(end_date__lte=filters['end_date'])
-        if filters.get('department'):
-            queryset = queryset.filter(user__department=filters['department'])
-        if filters.get('employee'):
-            queryset = queryset.filter(user_id=filters['employee'])
-        if filters.get('leave_type'):
-            queryset = queryset.filter(leave_type_id=filters['leave_type'])
-        if filters.get('status'):
-            queryset = queryset.filter(status=filters['status'])
-
-        return list(queryset.values(
-            'id', 'user__first_name', 'user__last_name', 'user__employee_id',
-            'leave_type__name', 'start_date', 'end_date', 'total_days',
-            'status', 'reason', 'approved_by__first_name', 'approved_by__last_name',
-            'approved_at', 'created_at'
-        ))
-
-    def generate_payroll_report(self, execution):
-        """Generate payroll report data"""
-        filters = execution.filters
-        
-        queryset = Payroll.objects.all()
-        
-        # Apply filters
-        if filters.get('month'):
-            queryset = queryset.filter(month=filters['month'])
-        if filters.get('year'):
-            queryset = queryset.filter(year=filters['year'])
-        if filters.get('department'):
-            queryset = queryset.filter(user__department=filters['department'])
-        if filters.get('employee'):
-            queryset = queryset.filter(user_id=filters['employee'])
-        if filters.get('status'):
-            queryset = queryset.filter(status=filters['status'])
-
-        return list(queryset.values(
-            'id', 'user__first_name', 'user__last_name', 'user__employee_id',
-            'month', 'year', 'basic_salary', 'overtime_pay', 'bonus',
-            'deductions', 'gross_pay', 'tax_deduction', 'net_pay',
-            'status', 'generated_at'
-        ))
-
-    def generate_shift_report(self, execution):
-        """Generate shift report data"""
-        filters = execution.filters
-        
-        queryset = ShiftSchedule.objects.all()
-        
-        # Apply filters
-        if filters.get('start_date'):
-            queryset = queryset.filter(date__gte=filters['start_date'])
-        if filters.get('end_date'):
-            queryset = queryset.filter(date__lte=filters['end_date'])
-        if filters.get('department'):
-            queryset = queryset.filter(employee__department=filters['department'])
-        if filters.get('employee'):
-            queryset = queryset.filter(employee_id=filters['employee'])
-        if filters.get('shift'):
-            queryset = queryset.filter(shift_id=filters['shift'])
-        if filters.get('status'):
-            queryset = queryset.filter(status=filters['status'])
-
-        return list(queryset.values(
-            'id', 'employee__first_name', 'employee__last_name', 'employee__employee_id',
-            'shift__name', 'date', 'shift__start_time', 'shift__end_time',
-            'status', 'notes', 'created_by__first_name', 'created_by__last_name',
-            'created_at'
-        ))
+        # Generate in a worker once the execution row is committed
+        queue_report_execution(execution)
 
 
 class ReportExecutionDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -273,7 +143,7 @@ class ReportExecutionDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         """Filter based on user permissions"""
         user = self.request.user
-        queryset = ReportExecution.objects.all()
+        queryset = ReportExecution.objects.select_related('template', 'requested_by').with_expiry()
         
         if user.role in ['hr', 'manager']:
             return queryset
@@ -302,18 +172,40 @@ def download_report(request, execution_id):
         # Mark as downloaded
         execution.mark_as_downloaded()
         
-        # Return file response
-        return FileResponse(
+        # Return file response, sent in REPORT_DOWNLOAD_BLOCK_SIZE chunks
+        response = FileResponse(
             open(execution.file_path, 'rb'),
             as_attachment=True,
             filename=f"{execution.name}.{execution.format_type}"
         )
+        response.block_size = REPORT_DOWNLOAD_BLOCK_SIZE
+        return response
         
     except ReportExecution.DoesNotExist:
         return Response({'error': 'Report not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
 # Quick Report Generation
+ATTENDANCE_REPORT_FIELDS = (
+    'user__first_name', 'user__last_name', 'date',
+    'check_in_time', 'check_out_time', 'status', 'hours_worked'
+)
+
+LEAVE_REPORT_FIELDS = (
+    'user__first_name', 'user__last_name', 'leave_type__name',
+    'start_date', 'end_date', 'total_days', 'status', 'reason'
+)
+
+# Rows fetched per database round-trip when streaming reports
+REPORT_STREAM_CHUNK_SIZE = 2000
+
+# Largest in-memory JSON report; bigger exports should use CSV or NDJSON
+REPORT_JSON_MAX_ROWS = 10000
+
+# Bytes read per chunk when sending generated report files
+REPORT_DOWNLOAD_BLOCK_SIZE = 8192
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def generate_attendance_report(request):
@@ -322,30 +214,25 @@ def generate_attendance_report(request):
     if serializer.is_valid():
         data = serializer.validated_data
         
-        # Query attendance data
-        queryset = Attendance.objects.filter(
-            date__range=[data['start_date'], data['end_date']]
-        )
-        
-        # Apply filters
+        # Query attendance data, applying every filter in one call
+        q = Q(date__range=[data['start_date'], data['end_date']])
         if data.get('department'):
-            queryset = queryset.filter(user__department=data['department'])
+            q &= Q(user__department=data['department'])
         if data.get('employee'):
-            queryset = queryset.filter(user_id=data['employee'])
+            q &= Q(user_id=data['employee'])
         if data.get('status'):
-            queryset = queryset.filter(status=data['status'])
+            q &= Q(status=data['status'])
+        queryset = Attendance.objects.filter(q)
         
         # Generate response based on format
         if data['format'] == 'csv':
             return generate_csv_response(queryset, 'attendance_report')
         elif data['format'] == 'json':
-            return Response({
-                'data': list(queryset.values(
-                    'user__first_name', 'user__last_name', 'date',
-                    'check_in_time', 'check_out_time', 'status', 'hours_worked'
-                )),
-                'count': queryset.count()
-            })
+            return generate_json_response(queryset.values(*ATTENDANCE_REPORT_FIELDS))
+        elif data['format'] == 'ndjson':
+            return generate_ndjson_response(
+                queryset.values(*ATTENDANCE_REPORT_FIELDS), 'attendance_report'
+            )
         else:
             # PDF format
             return generate_pdf_response(queryset, 'attendance_report')
@@ -361,32 +248,27 @@ def generate_leave_report(request):
     if serializer.is_valid():
         data = serializer.validated_data
         
-        # Query leave data
-        queryset = LeaveRequest.objects.filter(
-            start_date__range=[data['start_date'], data['end_date']]
-        )
-        
-        # Apply filters
+        # Query leave data, applying every filter in one call
+        q = Q(start_date__range=[data['start_date'], data['end_date']])
         if data.get('department'):
-            queryset = queryset.filter(user__department=data['department'])
+            q &= Q(user__department=data['department'])
         if data.get('employee'):
-            queryset = queryset.filter(user_id=data['employee'])
+            q &= Q(user_id=data['employee'])
         if data.get('leave_type'):
-            queryset = queryset.filter(leave_type_id=data['leave_type'])
+            q &= Q(leave_type_id=data['leave_type'])
         if data.get('status'):
-            queryset = queryset.filter(status=data['status'])
+            q &= Q(status=data['status'])
+        queryset = LeaveRequest.objects.filter(q)
         
         # Generate response based on format
         if data['format'] == 'csv':
             return generate_csv_response(queryset, 'leave_report')
         elif data['format'] == 'json':
-            return Response({
-                'data': list(queryset.values(
-                    'user__first_name', 'user__last_name', 'leave_type__name',
-                    'start_date', 'end_date', 'total_days', 'status', 'reason'
-                )),
-                'count': queryset.count()
-            })
+            return generate_json_response(queryset.values(*LEAVE_REPORT_FIELDS))
+        elif data['format'] == 'ndjson':
+            return generate_ndjson_response(
+                queryset.values(*LEAVE_REPORT_FIELDS), 'leave_report'
+            )
         else:
             return generate_pdf_response(queryset, 'leave_report')
     
@@ -409,7 +291,7 @@ class DashboardListView(generics.ListCreateAPIView):
     def get_queryset(self):
         """Filter dashboards based on user permissions"""
         user = self.request.user
-        queryset = Dashboard.objects.filter(is_active=True)
+        queryset = Dashboard.objects.filter(is_active=True).select_related('created_by')
         
         if user.role in ['hr', 'manager']:
             return queryset
@@ -425,18 +307,16 @@ class DashboardListView(generics.ListCreateAPIView):
 def dashboard_data(request, dashboard_id):
     """Get dashboard data with all widgets"""
     try:
-        dashboard = Dashboard.objects.get(id=dashboard_id, is_active=True)
+        # The serializer reads the creator's name, so join it in up front
+        dashboard = Dashboard.objects.select_related('created_by').get(id=dashboard_id, is_active=True)
         
         # Check permissions
         user = request.user
-        if user.role not in ['hr', 'manager'] and dashboard.created_by != user and not dashboard.is_public:
+        if user.role not in ['hr', 'manager'] and dashboard.created_by_id != user.id and not dashboard.is_public:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         # Generate widget data
-        widgets_data = []
-        for widget_config in dashboard.widgets:
-            widget_data = create_dashboard_widgets(widget_config, user)
-            widgets_data.append(widget_data)
+        widgets_data = build_dashboard(dashboard.widgets, user)
         
         return Response({
             'dashboard': DashboardSerializer(dashboard).data,
@@ -467,8 +347,12 @@ def analytics_data(request):
     if serializer.is_valid():
         data = serializer.validated_data
         
-        # Calculate analytics metrics
-        analytics = calculate_analytics_metrics(data)
+        # Calculate analytics metrics, reusing a cached payload for repeat ranges
+        analytics = cached_analytics(
+            'analytics',
+            {'role': request.user.role, **data},
+            lambda: calculate_analytics_metrics(data)
+        )
         
         return Response(analytics)
     
@@ -483,85 +367,154 @@ def attendance_analytics(request):
     end_date = timezone.now().date()
     start_date = end_date.replace(day=1)
     
-    if request.query_params.get('start_date'):
-        start_date = datetime.strptime(request.query_params['start_date'], '%Y-%m-%d').date()
-    if request.query_params.get('end_date'):
-        end_date = datetime.strptime(request.query_params['end_date'], '%Y-%m-%d').date()
+    try:
+        if request.query_params.get('start_date'):
+            start_date = date.fromisoformat(request.query_params['start_date'])
+        if request.query_params.get('end_date'):
+            end_date = date.fromisoformat(request.query_params['end_date'])
+    except ValueError:
+        return Response(
+            {'error': 'start_date and end_date must be YYYY-MM-DD dates'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    # Calculate metrics
+    return Response(cached_analytics(
+        'attendance_analytics',
+        {'role': request.user.role, 'start_date': start_date, 'end_date': end_date},
+        lambda: calculate_attendance_analytics(start_date, end_date)
+    ))
+
+
+def calculate_attendance_analytics(start_date, end_date):
+    """Build the attendance analytics payload for a date range"""
     total_days = (end_date - start_date).days + 1
     attendance_data = Attendance.objects.filter(date__range=[start_date, end_date])
     
-    # Attendance rate by status
-    status_counts = attendance_data.values('status').annotate(count=Count('id'))
-    
-    # Daily attendance trends
-    daily_trends = attendance_data.values('date').annotate(
-        present=Count(Case(When(status='present', then=1), output_field=IntegerField())),
-        late=Count(Case(When(status='late', then=1), output_field=IntegerField())),
-        absent=Count(Case(When(status='absent', then=1), output_field=IntegerField()))
-    ).order_by('date')
+    # Attendance rate by status and daily trends from one GROUP BY
+    status_counts, daily_trends = pivot_day_status_counts(attendance_data)
     
     # Department-wise attendance
     dept_attendance = attendance_data.values('user__department').annotate(
         total=Count('id'),
-        present=Count(Case(When(status='present', then=1), output_field=IntegerField()))
+        present=Count('id', filter=Q(status='present'))
     )
     
-    return Response({
+    return {
         'period': {'start_date': start_date, 'end_date': end_date, 'total_days': total_days},
-        'status_summary': list(status_counts),
-        'daily_trends': list(daily_trends),
+        'status_summary': status_counts,
+        'daily_trends': daily_trends,
         'department_summary': list(dept_attendance),
-        'total_records': attendance_data.count()
-    })
+        'total_records': sum(row['count'] for row in status_counts)
+    }
 
 
 # Helper functions
-def generate_csv_response(queryset, filename):
-    """Generate CSV response from queryset"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+def pivot_day_status_counts(attendance_data):
+    """
+    Group attendance by (date, status) once and split it into a status summary
+    sorted by status and per-day present/late/absent trends sorted by date
+    """
+    status_totals = {}
+    trends = {}
+    rows = attendance_data.values_list('date', 'status').annotate(count=Count('id')).order_by()
+    for day, row_status, count in rows:
+        status_totals[row_status] = status_totals.get(row_status, 0) + count
+        trend = trends.setdefault(day, {'date': day, 'total': 0, 'present': 0, 'late': 0, 'absent': 0})
+        trend['total'] += count
+        if row_status in ('present', 'late', 'absent'):
+            trend[row_status] += count
+    
+    status_counts = [
+        {'status': row_status, 'count': count} for row_status, count in sorted(status_totals.items())
+    ]
+    return status_counts, [trends[day] for day in sorted(trends)]
+
+
+def generate_json_response(rows):
+    """Return up to REPORT_JSON_MAX_ROWS rows of a values() queryset as a JSON body"""
+    # Fetch one extra row to tell whether the report was cut short
+    data = list(rows[:REPORT_JSON_MAX_ROWS + 1])
+    truncated = len(data) > REPORT_JSON_MAX_ROWS
+    if truncated:
+        data.pop()
+    return Response({'data': data, 'count': len(data), 'truncated': truncated})
+
+
+def generate_ndjson_response(rows, filename):
+    """Stream a values() queryset as newline-delimited JSON"""
+    response = StreamingHttpResponse(
+        (
+            json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+            for row in rows.iterator(chunk_size=REPORT_STREAM_CHUNK_SIZE)
+        ),
+        content_type='application/x-ndjson'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    return response
+
+
+class Echo:
+    """Pseudo-buffer whose write() returns the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+
+def stream_csv_response(header, rows, filename):
+    """Stream a header and an iterable of rows as a CSV attachment"""
+    writer = csv.writer(Echo())
     
-    writer = csv.writer(response)
+    def csv_generator():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
     
-    # Write headers (based on queryset model)
+    response = StreamingHttpResponse(csv_generator(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def generate_csv_response(queryset, filename):
+    """Stream a CSV response from queryset"""
+    # Headers and columns based on queryset model
     if queryset.model == Attendance:
-        writer.writerow(['Employee', 'Date', 'Check In', 'Check Out', 'Status', 'Hours Worked'])
-        for record in queryset:
-            writer.writerow([
-                f"{record.user.first_name} {record.user.last_name}",
-                record.date,
-                record.check_in_time,
-                record.check_out_time,
-                record.status,
-                record.hours_worked
-            ])
+        header = ['Employee', 'Date', 'Check In', 'Check Out', 'Status', 'Hours Worked']
+        fields = ATTENDANCE_REPORT_FIELDS
     elif queryset.model == LeaveRequest:
-        writer.writerow(['Employee', 'Leave Type', 'Start Date', 'End Date', 'Days', 'Status', 'Reason'])
-        for record in queryset:
-            writer.writerow([
-                f"{record.user.first_name} {record.user.last_name}",
-                record.leave_type.name,
-                record.start_date,
-                record.end_date,
-                record.total_days,
-                record.status,
-                record.reason
-            ])
-    
-    return response
+        header = ['Employee', 'Leave Type', 'Start Date', 'End Date', 'Days', 'Status', 'Reason']
+        fields = LEAVE_REPORT_FIELDS
+    else:
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+    
+    # One joined query returning plain tuples; the name columns lead each row
+    rows = queryset.values_list(*fields).iterator(chunk_size=REPORT_STREAM_CHUNK_SIZE)
+    return stream_csv_response(
+        header,
+        ((f"{first_name} {last_name}", *values) for first_name, last_name, *values in rows),
+        filename
+    )
 
 
 def generate_pdf_response(queryset, filename):
     """Generate PDF response from queryset"""
-    # This would use a library like ReportLab
-    # For now, return a placeholder response
-    return Response({
-        'message': 'PDF generation not implemented yet',
-        'data_count': queryset.count(),
-        'filename': f"{filename}.pdf"
-    })
+    if queryset.model == Attendance:
+        report_type, fields = 'attendance', ATTENDANCE_REPORT_FIELDS
+    else:
+        report_type, fields = 'leave', LEAVE_REPORT_FIELDS
+    
+    # Rows are streamed into an anonymous temporary file, which the response
+    # sends from disk and which is removed once the response closes it
+    report_file = tempfile.TemporaryFile()
+    extension = write_pdf_report(queryset.values(*fields), report_type, report_file)
+    report_file.seek(0)
+    response = FileResponse(
+        report_file,
+        as_attachment=True,
+        filename=f"{filename}{extension}"
+    )
+    response.block_size = REPORT_DOWNLOAD_BLOCK_SIZE
+    return response
 
 
 @login_required
@@ -582,76 +535,66 @@ def team_analytics_web(request):
     
     if date_from:
         try:
-            start_date = datetime.strptime(date_from, '%Y-%m-%d').date()
+            start_date = date.fromisoformat(date_from)
         except ValueError:
             pass
     
     if date_to:
         try:
-            end_date = datetime.strptime(date_to, '%Y-%m-%d').date()
+            end_date = date.fromisoformat(date_to)
         except ValueError:
             pass
     
-    # Get team members
+    # Get team member ids once rather than repeating the subquery in every aggregate
     from users.models import User
-    team_members = User.objects.filter(manager=user)
+    team_member_ids = list(User.objects.filter(manager=user).values_list('id', flat=True))
     
     # Get attendance data for the period
     attendance_data = Attendance.objects.filter(
-        user__in=team_members,
+        user_id__in=team_member_ids,
         date__range=[start_date, end_date]
-    ).select_related('user')
+    )
     
     # Calculate analytics
     total_days = (end_date - start_date).days + 1
     
-    # Status summary
-    status_counts = attendance_data.values('status').annotate(
-        count=Count('id')
-    ).order_by('status')
-    
-    # Daily trends
-    daily_trends = attendance_data.values('date').annotate(
-        total=Count('id'),
-        present=Count(Case(When(status='present', then=1), output_field=IntegerField())),
-        absent=Count(Case(When(status='absent', then=1), output_field=IntegerField()))
-    ).order_by('date')
+    # Status summary, which also yields the overall totals, and daily trends from one GROUP BY
+    status_counts, daily_trends = pivot_day_status_counts(attendance_data)
     
     # Department-wise attendance (if departments exist)
     dept_attendance = attendance_data.values('user__department').annotate(
         total=Count('id'),
-        present=Count(Case(When(status='present', then=1), output_field=IntegerField()))
+        present=Count('id', filter=Q(status='present'))
     )
     
-    # Employee performance
+    # Employee performance, with each attendance rate computed in the query
     employee_stats = attendance_data.values('user__id', 'user__first_name', 'user__last_name').annotate(
         total_days=Count('id'),
-        present_days=Count(Case(When(status='present', then=1), output_field=IntegerField())),
-        absent_days=Count(Case(When(status='absent', then=1), output_field=IntegerField())),
-        late_days=Count(Case(When(status='late', then=1), output_field=IntegerField()))
+        present_days=Count('id', filter=Q(status='present')),
+        absent_days=Count('id', filter=Q(status='absent')),
+        late_days=Count('id', filter=Q(status='late'))
+    ).annotate(
+        # Every group has at least one record, so total_days is never zero
+        attendance_rate=Round(F('present_days') * 100.0 / F('total_days'), 1, output_field=FloatField())
     ).order_by('-present_days')
     
-    # Calculate attendance rate for each employee
-    for emp in employee_stats:
-        if emp['total_days'] > 0:
-            emp['attendance_rate'] = round((emp['present_days'] / emp['total_days']) * 100, 1)
-        else:
-            emp['attendance_rate'] = 0
-    
     # Overall statistics
-    total_records = attendance_data.count()
-    present_count = attendance_data.filter(status='present').count()
+    total_records = sum(row['count'] for row in status_counts)
+    present_count = next((row['count'] for row in status_counts if row['status'] == 'present'), 0)
     overall_attendance_rate = round((present_count / total_records * 100), 1) if total_records > 0 else 0
     
     context = {
         'start_date': start_date,
         'end_date': end_date,
         'total_days': total_days,
-        'team_members': team_members,
+        'team_member_count': len(team_member_ids),
         'status_counts': status_counts,
         'daily_trends': daily_trends,
         'dept_attendance': dept_attendance,
+        # Querysets are only run when a fragment misses the cache; the version
+        # expires cached fragments whenever analytics are invalidated
         'employee_stats': employee_stats,
+        'analytics_version': get_analytics_version(),
         'total_records': total_records,
         'overall_attendance_rate': overall_attendance_rate,
         'date_from': date_from,
@@ -678,13 +621,13 @@ def generate_team_report_web(request):
         format_type = request.POST.get('format_type', 'csv')
         employee_filter = request.POST.get('employee')
         
-        # Get team members
+        # Get team member ids once for the report query
         from users.models import User
-        team_members = User.objects.filter(manager=user)
+        team_member_ids = list(User.objects.filter(manager=user).values_list('id', flat=True))
         
         # Build queryset based on report type
         if report_type == 'attendance':
-            queryset = Attendance.objects.filter(user__in=team_members)
+            queryset = Attendance.objects.filter(user_id__in=team_member_ids)
             if date_from:
                 queryset = queryset.filter(date__gte=date_from)
             if date_to:
@@ -692,32 +635,31 @@ def generate_team_report_web(request):
             if employee_filter:
                 queryset = queryset.filter(user_id=employee_filter)
             
-            queryset = queryset.select_related('user').order_by('-date', 'user__first_name')
+            queryset = queryset.order_by('-date', 'user__first_name')
             
-            # Generate CSV response
+            # Stream CSV response from plain tuples
             if format_type == 'csv':
-                response = HttpResponse(content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="attendance_report_{date_from}_{date_to}.csv"'
-                
-                writer = csv.writer(response)
-                writer.writerow(['Employee', 'Employee ID', 'Date', 'Check In', 'Check Out', 'Status', 'Hours Worked', 'Department'])
-                
-                for record in queryset:
-                    writer.writerow([
-                        f"{record.user.first_name} {record.user.last_name}",
-                        record.user.employee_id or '',
-                        record.date,
-                        record.check_in_time or '',
-                        record.check_out_time or '',
-                        record.status,
-                        record.hours_worked or 0,
-                        record.user.department or ''
-                    ])
-                
-                return response
+                rows = queryset.values_list(
+                    'user__first_name', 'user__last_name', 'user__employee_id', 'date',
+                    'check_in_time', 'check_out_time', 'status', 'hours_worked', 'user__department'
+                ).iterator(chunk_size=REPORT_STREAM_CHUNK_SIZE)
+                return stream_csv_response(
+                    ['Employee', 'Employee ID', 'Date', 'Check In', 'Check Out', 'Status', 'Hours Worked', 'Department'],
+                    (
+                        (
+                            f"{first_name} {last_name}", employee_id or '', day,
+                            check_in or '', check_out or '', record_status, hours or 0, department or ''
+                        )
+                        for (
+                            first_name, last_name, employee_id, day,
+                            check_in, check_out, record_status, hours, department
+                        ) in rows
+                    ),
+                    f"attendance_report_{date_from}_{date_to}"
+                )
         
         elif report_type == 'leave':
-            queryset = LeaveRequest.objects.filter(user__in=team_members)
+            queryset = LeaveRequest.objects.filter(user_id__in=team_member_ids)
             if date_from:
                 queryset = queryset.filter(start_date__gte=date_from)
             if date_to:
@@ -725,35 +667,30 @@ def generate_team_report_web(request):
             if employee_filter:
                 queryset = queryset.filter(user_id=employee_filter)
             
-            queryset = queryset.select_related('user', 'leave_type').order_by('-start_date')
+            queryset = queryset.order_by('-start_date')
             
-            # Generate CSV response
+            # Stream CSV response from plain tuples
             if format_type == 'csv':
-                response = HttpResponse(content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="leave_report_{date_from}_{date_to}.csv"'
-                
-                writer = csv.writer(response)
-                writer.writerow(['Employee', 'Employee ID', 'Leave Type', 'Start Date', 'End Date', 'Days', 'Status', 'Reason'])
-                
-                for record in queryset:
-                    writer.writerow([
-                        f"{record.user.first_name} {record.user.last_name}",
-                        record.user.employee_id or '',
-                        record.leave_type.name,
-                        record.start_date,
-                        record.end_date,
-                        record.total_days,
-                        record.status,
-                        record.reason
-                    ])
-                
-                return response
+                rows = queryset.values_list(
+                    'user__first_name', 'user__last_name', 'user__employee_id',
+                    *LEAVE_REPORT_FIELDS[2:]
+                ).iterator(chunk_size=REPORT_STREAM_CHUNK_SIZE)
+                return stream_csv_response(
+                    ['Employee', 'Employee ID', 'Leave Type', 'Start Date', 'End Date', 'Days', 'Status', 'Reason'],
+                    (
+                        (f"{first_name} {last_name}", employee_id or '', *values)
+                        for first_name, last_name, employee_id, *values in rows
+                    ),
+                    f"leave_report_{date_from}_{date_to}"
+                )
         
         messages.success(request, 'Report generated successfully!')
     
-    # Get team members for form
+    # Get team members for form, with only the columns the template shows
     from users.models import User
-    team_members = User.objects.filter(manager=user)
+    team_members = User.objects.filter(manager=user).only(
+        'id', 'username', 'first_name', 'last_name', 'employee_id'
+    )
     
     context = {
         'team_members': team_members,
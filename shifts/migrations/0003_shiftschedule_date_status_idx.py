@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shifts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shiftschedule',
+            index=models.Index(fields=['date', 'status'], name='idx_shift_date_status'),
+        ),
+    ]
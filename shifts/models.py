@@ -129,6 +129,9 @@ class ShiftSchedule(models.Model):
     class Meta:
         ordering = ['-date', 'shift__start_time']
         unique_together = ['employee', 'date']
+        indexes = [
+            models.Index(fields=['date', 'status'], name='idx_shift_date_status'),
+        ]
         verbose_name = "Shift Schedule"
         verbose_name_plural = "Shift Schedules"
 
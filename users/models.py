@@ -26,7 +26,7 @@ class User(AbstractUser):
         validators=[RegexValidator(r'^\+?1?\d{9,15}$', 'Enter a valid phone number.')],
         blank=True
     )
-    department = models.CharField(max_length=100, blank=True)
+    department = models.CharField(max_length=100, blank=True, db_index=True)
     position = models.CharField(max_length=100, blank=True)
     hire_date = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)